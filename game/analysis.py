@@ -0,0 +1,277 @@
+import json
+from hashlib import blake2b
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict
+import numpy as np
+
+from .map import Map, Tile, dirs
+from .cache import LevelCache
+
+UNREACHABLE = 1000 # finite cost of cells that cannot be reached, so that matchings stay solvable
+
+def walk_distances(level: Map, x: int, y: int) -> np.ndarray:
+    """
+    Calculates the number of steps for the player to walk from every cell to a target cell.
+
+    Boxes are ignored, so the distances are lower bounds in any state of the level.
+
+    Args:
+        level (Map): The map of the level.
+        x (int): The x-coordinate of the target cell.
+        y (int): The y-coordinate of the target cell.
+
+    Returns:
+        np.ndarray: The flat array of distances by cell index, UNREACHABLE where the target cannot be reached.
+    """
+    walls = _walls(level)
+    width = level.scale[1]
+    distances = np.full(level.tiles.size, UNREACHABLE, dtype=np.int32)
+    distances[x * width + y] = 0
+    queue = deque([(x, y)])
+    while queue:
+        x, y = queue.popleft()
+        distance = distances[x * width + y] + 1
+        for dx, dy in dirs:
+            nx, ny = x + dx, y + dy
+            cell = nx * width + ny
+            if not walls[nx, ny] and distances[cell] == UNREACHABLE:
+                distances[cell] = distance
+                queue.append((nx, ny))
+    return distances
+
+def pull_distances(level: Map, x: int, y: int) -> np.ndarray:
+    """
+    Calculates the number of pulls to bring a box from every cell to a target cell.
+
+    A pull moves a box from a cell to a neighbour while the player steps back from that neighbour,
+    so both the neighbour and the cell behind it must be free of walls. Other boxes are ignored.
+
+    Args:
+        level (Map): The map of the level.
+        x (int): The x-coordinate of the target cell.
+        y (int): The y-coordinate of the target cell.
+
+    Returns:
+        np.ndarray: The flat array of distances by cell index, UNREACHABLE where the target cannot be reached.
+    """
+    walls = _walls(level)
+    width = level.scale[1]
+    distances = np.full(level.tiles.size, UNREACHABLE, dtype=np.int32)
+    distances[x * width + y] = 0
+    queue = deque([(x, y)])
+    while queue:
+        x, y = queue.popleft()
+        distance = distances[x * width + y] + 1
+        for dx, dy in dirs:
+            # the box came from the cell behind, pulled by a player stepping ahead
+            px, py = x - dx, y - dy
+            cell = px * width + py
+            if not (walls[px, py] or walls[x + dx, y + dy]) and distances[cell] == UNREACHABLE:
+                distances[cell] = distance
+                queue.append((px, py))
+    return distances
+
+def push_distances(level: Map, x: int, y: int) -> np.ndarray:
+    """
+    Calculates the number of pushes to bring a box from every cell to a target cell.
+
+    A push moves a box from a cell to a neighbour while the player steps from the cell behind it,
+    so both that cell and the box's cell must be free of walls. Other boxes are ignored.
+
+    Args:
+        level (Map): The map of the level.
+        x (int): The x-coordinate of the target cell.
+        y (int): The y-coordinate of the target cell.
+
+    Returns:
+        np.ndarray: The flat array of distances by cell index, UNREACHABLE where the target cannot be reached.
+    """
+    walls = _walls(level)
+    width = level.scale[1]
+    distances = np.full(level.tiles.size, UNREACHABLE, dtype=np.int32)
+    distances[x * width + y] = 0
+    queue = deque([(x, y)])
+    while queue:
+        x, y = queue.popleft()
+        distance = distances[x * width + y] + 1
+        for dx, dy in dirs:
+            # the box came from the cell behind, pushed by a player behind it
+            px, py = x - dx, y - dy
+            cell = px * width + py
+            if not (walls[px, py] or walls[px - dx, py - dy]) and distances[cell] == UNREACHABLE:
+                distances[cell] = distance
+                queue.append((px, py))
+    return distances
+
+def freeze_patterns(level: Map) -> np.ndarray:
+    """
+    Lists the 2x2 squares of a level in which boxes on every floor cell are frozen.
+
+    None of the boxes of a square filled with walls and boxes can be pushed, so such a state
+    is a deadlock unless every box of the square is on a goal. Only squares with a floor cell
+    off the goals and at least two floor cells are listed, since the others never deadlock or
+    are already dead squares.
+
+    Args:
+        level (Map): The map of the level.
+
+    Returns:
+        np.ndarray: The n*4 array of the cell indices of each square, -1 for walls.
+    """
+    height, width = level.scale
+    patterns = []
+    for x in range(height - 1):
+        for y in range(width - 1):
+            square = level.tiles[x:x + 2, y:y + 2].reshape(-1)
+            floor = square != Tile.WALL
+            if floor.sum() < 2 or not np.any(floor & (square != Tile.GOAL)):
+                continue
+            cells = np.array([x * width + y, x * width + y + 1, (x + 1) * width + y, (x + 1) * width + y + 1])
+            patterns.append(np.where(floor, cells, -1))
+    return np.array(patterns, dtype=np.int32).reshape(-1, 4)
+
+def level_hash(level: Map) -> str:
+    """Returns a short hash identifying the initial map of a level."""
+    return blake2b(str(level).encode(), digest_size=8).hexdigest()
+
+def floor_hash(level: Map) -> str:
+    """Returns a short hash identifying the walls and goals of a level, whatever its player and boxes."""
+    return blake2b(str(level.floor()).encode(), digest_size=8).hexdigest()
+
+class LevelTables:
+    """
+    Precomputed tables of a level, optionally placed in shared memory for worker processes.
+
+    The tables that only depend on the walls and goals are computed once per floor, and the distances
+    to the initial boxes and player once per level. Both are kept in a LevelCache if one is given,
+    under the floor hash and the level hash, so that a level loaded again skips their precomputation.
+
+    Shared tables live in one shared memory block named after the level hash, starting with a
+    JSON header of the array layout. Pickling shared tables only sends the level hash, and
+    unpickling attaches to the block without copying, so worker processes started by the
+    creator share one copy of the tables.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): The tables by name.
+
+    Attributes:
+        dead (np.ndarray): Whether a box on each cell can never be pushed to a goal, by cell index.
+        pull (np.ndarray): The number of pulls from each cell to each initial box position, by box and cell index.
+        walk (np.ndarray): The number of steps from each cell to the initial player position, by cell index.
+        patterns (np.ndarray): The cell indices of the 2x2 freeze deadlock patterns (see freeze_patterns).
+
+    Methods:
+        compute(level: Map, cache: LevelCache|None = None) -> LevelTables: Computes the tables of a level.
+        share(level: Map, cache: LevelCache|None = None) -> LevelTables: Computes the tables of a level into shared memory.
+        attach(key: str) -> LevelTables: Attaches to the shared tables of a level hash.
+        rooted_at(level: Map) -> LevelTables: Returns the tables with the distances to the boxes and player of another map.
+        release() -> None: Detaches from shared memory, freeing it if these tables created it.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.__dict__.update(arrays)
+        self._names = list(arrays)
+        self._shm: SharedMemory|None = None
+        self._owner = False
+        self.key: str|None = None
+
+    def __reduce__(self):
+        if self._shm is None:
+            return LevelTables, ({name: getattr(self, name) for name in self._names},)
+        return LevelTables.attach, (self.key,)
+
+    @classmethod
+    def compute(cls, level: Map, cache: LevelCache|None = None) -> "LevelTables":
+        key = floor_hash(level)
+        floor_tables = cache.load(key) if cache is not None else None
+        if floor_tables is None:
+            floor_tables = _floor_tables(level.floor())
+            if cache is not None:
+                cache.store(key, floor_tables)
+        key = level_hash(level)
+        level_tables = cache.load(key) if cache is not None else None
+        if level_tables is None:
+            level_tables = _level_tables(level)
+            if cache is not None:
+                cache.store(key, level_tables)
+        return cls({**floor_tables, **level_tables})
+
+    @classmethod
+    def share(cls, level: Map, cache: LevelCache|None = None) -> "LevelTables":
+        key = level_hash(level)
+        try:
+            return cls.attach(key)
+        except FileNotFoundError:
+            pass
+        computed = cls.compute(level, cache)
+        arrays = {name: getattr(computed, name) for name in computed._names}
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (array.dtype.str, array.shape, offset)
+            offset += -(-array.nbytes // 8) * 8 # keep every table 8-byte aligned
+        header = json.dumps(layout).encode()
+        start = -(-(8 + len(header)) // 8) * 8
+        shm = SharedMemory(name=_shm_name(key), create=True, size=start + offset)
+        shm.buf[:8] = start.to_bytes(8, "little")
+        shm.buf[8:8 + len(header)] = header
+        tables = cls._map(shm, key)
+        for name, array in arrays.items():
+            getattr(tables, name)[...] = array
+        tables._owner = True
+        return tables
+
+    @classmethod
+    def attach(cls, key: str) -> "LevelTables":
+        # child processes share the resource tracker of the creator, which frees the block if it dies
+        return cls._map(SharedMemory(name=_shm_name(key)), key)
+
+    @classmethod
+    def _map(cls, shm: SharedMemory, key: str) -> "LevelTables":
+        """Creates tables viewing the arrays of a shared memory block."""
+        start = int.from_bytes(shm.buf[:8], "little")
+        layout = json.loads(bytes(shm.buf[8:start]).rstrip(b"\0"))
+        tables = cls({name: np.ndarray(tuple(shape), np.dtype(dtype), shm.buf, start + offset)
+                      for name, (dtype, shape, offset) in layout.items()})
+        tables._shm = shm
+        tables.key = key
+        return tables
+
+    def rooted_at(self, level: Map) -> "LevelTables":
+        """Returns tables sharing the floor tables of these, with the distances to the boxes and player of another map of the level."""
+        arrays = {name: getattr(self, name) for name in self._names}
+        arrays.update(_level_tables(level))
+        return LevelTables(arrays)
+
+    def release(self) -> None:
+        if self._shm is None:
+            return
+        for name in self._names:
+            delattr(self, name) # the views must go before the block can be closed
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+def _floor_tables(floor: Map) -> Dict[str, np.ndarray]:
+    """Computes the tables of a level that only depend on its walls and goals."""
+    # O(goals x cells), only kept for the dead squares
+    push = np.stack([push_distances(floor, x, y) for x, y in floor.locate_goals()])
+    return {
+        "dead": np.all(push == UNREACHABLE, axis=0),
+        "patterns": freeze_patterns(floor),
+    }
+
+def _level_tables(level: Map) -> Dict[str, np.ndarray]:
+    """Computes the tables of a level that depend on its initial boxes and player."""
+    floor = level.floor()
+    return {
+        "pull": np.stack([pull_distances(floor, x, y) for x, y in level.locate_boxes()]),
+        "walk": walk_distances(floor, level.player_x, level.player_y),
+    }
+
+def _shm_name(key: str) -> str:
+    return f"sokoban_{key}"
+
+def _walls(level: Map) -> np.ndarray:
+    """Returns the wall mask of a level, padded so that neighbours of the border are walls."""
+    return np.pad(level.tiles == Tile.WALL, ((0, 1), (0, 1)), constant_values=True)
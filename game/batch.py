@@ -0,0 +1,206 @@
+import os
+import json
+import math
+import time
+import logging
+import resource
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from sealgo.best_first_search import AStar, LazyAStar
+from sealgo.bidirectional import BiDirectional
+from sealgo.portfolio import SolverConfig
+from sealgo.problem import Action
+from sealgo.stats import SearchStats
+from sealgo import probes
+
+from .map import Map
+from .biproblem import BiSokobanProblem
+from .analysis import LevelTables
+from .cache import LevelCache
+
+# search configurations compared by the batch solver and raced by the portfolio solver
+CONFIGS = [
+    SolverConfig("bidirectional", BiDirectional, AStar, weight=3),
+    SolverConfig("backward", BiDirectional, AStar, b_weight=np.inf, weight=3),
+    SolverConfig("lazy-bidirectional", BiDirectional, LazyAStar, weight=3),
+    SolverConfig("forward", AStar, weight=3),
+]
+COMPLETED = ("solved", "failed") # statuses of jobs that are not run again on resume
+
+def run_batch(levels: List[int], configs: List[SolverConfig], output: str, timeout: float|None = None,
+              memory_limit: int|None = None, workers: int|None = None, levels_folder: str = "levels",
+              cache: LevelCache|None = None) -> List[Dict]:
+    """
+    Solves every level with every configuration, running each job in its own process.
+
+    Each result is appended to the output file as a JSON line as soon as its job ends. Jobs already
+    solved or failed in the output file are skipped, so an interrupted batch resumes where it
+    stopped, and the searches of jobs that run out of time are checkpointed to continue on resume.
+    The tables of each level are computed once into shared memory for all of its jobs. The search
+    statistics of the completed jobs are then summarized by configuration (see summarize).
+
+    Args:
+        levels (List[int]): The level numbers to solve.
+        configs (List[SolverConfig]): The search configurations to run on each level.
+        output (str): The path of the JSONL file of results.
+        timeout (float|None): The time limit of each job in seconds, unlimited if None. Default is None.
+        memory_limit (int|None): The address space limit of each job in bytes, unlimited if None. Default is None.
+        workers (int|None): The number of jobs run at once, the number of CPUs if None. Default is None.
+        levels_folder (str): The folder of the level files. Default is "levels".
+        cache (LevelCache|None): The on-disk cache of the level tables, not cached if None. Default is None.
+
+    Returns:
+        List[Dict]: The results of the jobs run, each with the level, the configuration name, the status
+            ("solved", "failed", "timeout", "memory_limit" or "error"), the elapsed time, the solution length,
+            the number of nodes, the branching factor, the search statistics and the solution.
+    """
+    workers = workers or os.cpu_count() or 1
+    done = _completed(output)
+    pending = deque((lvl_num, config) for lvl_num in levels for config in configs
+                    if (lvl_num, config.name) not in done)
+    running: Dict[Connection, Tuple[Process, int, SolverConfig, float]] = {}
+    tables: Dict[int, LevelTables] = {}
+    results = []
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "a") as file:
+        if file.tell() and not _ends_line(output):
+            file.write("\n") # end the line cut short by a kill, so the next result starts its own
+        def record(result: Dict) -> None:
+            probes.merge(result.pop("probes", {}))
+            results.append(result)
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            logging.info(f"Level {result['level']} ({result['config']}): {result['status']} "
+                         f"in {result['elapsed_time']:.2f} seconds.")
+
+        while pending or running:
+            while pending and len(running) < workers:
+                lvl_num, config = pending.popleft()
+                receiver, sender = Pipe(duplex=False)
+                level = Map(os.path.join(levels_folder, f"level{lvl_num}.txt"))
+                if lvl_num not in tables:
+                    tables[lvl_num] = LevelTables.share(level, cache)
+                checkpoint_path = os.path.join(directory, "checkpoints", f"level{lvl_num}_{config.name}.npz")
+                process = Process(target=_solve, args=(level, tables[lvl_num], config, memory_limit, checkpoint_path, sender),
+                                  daemon=True)
+                process.start()
+                sender.close()
+                running[receiver] = (process, lvl_num, config, time.perf_counter())
+            for receiver in wait(list(running), timeout=0.1):
+                process, lvl_num, config, start_time = running.pop(receiver)
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    result = None
+                process.join()
+                if result is None:
+                    result = {"status": "error", "error": f"exit code {process.exitcode}"}
+                record({"level": lvl_num, "config": config.name, "elapsed_time": time.perf_counter() - start_time, **result})
+            for receiver, (process, lvl_num, config, start_time) in list(running.items()):
+                elapsed_time = time.perf_counter() - start_time
+                if timeout is not None and elapsed_time > timeout:
+                    process.terminate()
+                    process.join()
+                    del running[receiver]
+                    record({"level": lvl_num, "config": config.name, "elapsed_time": elapsed_time, "status": "timeout"})
+    for level_tables in tables.values():
+        level_tables.release()
+    summarize(output)
+    return results
+
+def summarize(output: str) -> Dict[str, Dict]:
+    """
+    Aggregates the search statistics of the completed jobs in an output file by configuration.
+
+    The summary is written next to the output file, with "_stats.json" in place of its extension.
+
+    Args:
+        output (str): The path of the JSONL file of results.
+
+    Returns:
+        Dict[str, Dict]: The number of jobs and the aggregated statistics (see SearchStats.to_dict) by configuration name.
+    """
+    stats: Dict[str, List[SearchStats]] = {}
+    with open(output) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "stats" in result:
+                stats.setdefault(result["config"], []).append(SearchStats.from_dict(result["stats"]))
+    summary = {name: {"jobs": len(config_stats), **SearchStats.aggregate(config_stats).to_dict()}
+               for name, config_stats in stats.items()}
+    with open(os.path.splitext(output)[0] + "_stats.json", "w") as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+def _completed(output: str) -> Set[Tuple[int, str]]:
+    """Returns the (level, configuration name) pairs of the completed jobs in an output file."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError: # a line cut short by a kill
+                continue
+            if result["status"] in COMPLETED:
+                done.add((result["level"], result["config"]))
+    return done
+
+def _ends_line(output: str) -> bool:
+    """Returns whether the last line of an output file is complete."""
+    with open(output, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+def _solve(level: Map, tables: LevelTables, config: SolverConfig, memory_limit: int|None, checkpoint_path: str,
+           sender: Connection) -> None:
+    """Runs one job in a worker process and sends its result, with the probe report if profiling."""
+    probes.reset()
+    result = _job(level, tables, config, memory_limit, checkpoint_path)
+    if probes.enabled():
+        result["probes"] = probes.report()
+    sender.send(result)
+
+def _job(level: Map, tables: LevelTables, config: SolverConfig, memory_limit: int|None, checkpoint_path: str) -> Dict:
+    """Runs one job under the memory limit and returns its result."""
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard_limit))
+    try:
+        algo = config.build(BiSokobanProblem(level, tables))
+        if hasattr(algo, "checkpoint"):
+            algo.checkpoint(checkpoint_path)
+        if memory_limit is not None and hasattr(algo, "limit_memory"):
+            # give up on the resident memory well before the address space runs out
+            algo.limit_memory(memory_limit * 3 // 4)
+        solutions = algo.search()
+    except MemoryError:
+        # lift the limit to be able to report
+        resource.setrlimit(resource.RLIMIT_AS, (hard_limit, hard_limit))
+        return {"status": "memory_limit"}
+    if getattr(algo, "status", None) == "memory_limit":
+        return {"status": "memory_limit", "stats": algo.stats.to_dict()}
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    if len(solutions) == 0:
+        return {"status": "failed", "stats": algo.stats.to_dict()}
+    # forward searches start their paths with the Action.STAY of the root, bidirectional ones do not
+    solution = [action for action in solutions[0] if action != Action.STAY]
+    nodes = len(algo.nodes) if hasattr(algo, "nodes") else None
+    return {
+        "status": "solved",
+        "length": len(solution),
+        "nodes": nodes,
+        "b_factor": math.log(nodes, len(solution)) if nodes and len(solution) > 1 else None,
+        "stats": algo.stats.to_dict(),
+        "solution": [action.name for action in solution],
+    }
@@ -1,10 +1,14 @@
-from typing import TypeAlias, List, Generator, Tuple
+from typing import TypeAlias, Dict, List, Generator, Tuple
 from copy import copy
 from functools import lru_cache
 from sealgo.problem import BiSearchProblem, Action, State
 
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
 from .map import Map
 from .problem import SokobanAction, SokobanProblem, _action_dirs
+from .analysis import LevelTables
 
 class BiSokobanProblem(SokobanProblem, BiSearchProblem):
     """
@@ -17,32 +21,52 @@ class BiSokobanProblem(SokobanProblem, BiSearchProblem):
         init_boxes (List[Tuple[int, int]]): The initial positions of the boxes.
 
     Methods:
-        __init__(self, init_state: Map) -> None: Initializes the BiSokobanProblem object.
+        __init__(self, init_state: Map, tables: LevelTables|None = None) -> None: Initializes the BiSokobanProblem object.
         __copy__(self) -> "BiSokobanProblem": Creates a copy of the BiSokobanProblem object.
-        goal_states(self, num: int = 10) -> List[Map]: Returns a list of possible goal states.
+        goal_states(self) -> Generator[Map]: Generates the distinct goal states.
         actions_to(self, map: Map) -> List[SokobanAction]: Returns a list of actions that can be taken to reach a given map state.
         reason(self, map: Map, action: Tuple[SokobanAction, bool]|Action) -> Map: Returns the resulting map after taking a given action.
         re_heuristic(self, map: Map) -> int: Returns the heuristic value for a given map state.
-        _player_to_start(self, map: Map) -> int: Returns the distance between the player and the starting position.
+        counters(self) -> Dict[str, int]: Adds the hits and misses of the backward heuristic cache to those of SokobanProblem.
+        cache_size(self) -> int: Adds the memory used by the backward heuristic cache to that of SokobanProblem.
+        clear_caches(self) -> None: Empties the heuristic caches of both directions.
+        rooted_at(self, state: Map) -> BiSokobanProblem: Returns the problem solved from another map, with its backward tables rebuilt.
+        _boxes_to_start(self, boxes: bytes) -> int: Returns the cost of pulling the packed boxes back to their initial positions.
     """
-    def __init__(self, init_state: Map) -> None:
-        super().__init__(init_state)
+    def __init__(self, init_state: Map, tables: LevelTables|None = None) -> None:
+        super().__init__(init_state, tables)
         self.init_boxes = init_state.locate_boxes()
         
     def __copy__(self) -> "BiSokobanProblem":
-        return BiSokobanProblem(self.level)
+        return BiSokobanProblem(self.level, self.tables)
     
-    def goal_states(self, num: int = 10) -> List[Map]:
+    def rooted_at(self, state: Map) -> "BiSokobanProblem":
         """
-        Returns a list of possible goal states for the problem.
+        Returns the problem solved from another map of the level.
+
+        The backward heuristic measures the distances to the initial boxes and player, so they are
+        computed again for the map, while the tables of the walls and goals are shared.
 
         Args:
-            num (int): The number of goal states to return. Defaults to 10.
+            state (Map): The map to solve from.
 
         Returns:
-            List[Map]: A list of possible goal states.
+            BiSokobanProblem: The problem whose initial state is the map.
+        """
+        return BiSokobanProblem(copy(state), self.tables.rooted_at(state))
+
+    def goal_states(self) -> Generator[Map, None, None]:
+        """
+        Generates the distinct goal states of the problem, one per player region around the solved boxes.
+
+        The states are generated lazily, but a backward search draws them all when it starts, so that
+        every root has cost 0 before the first expansion (see BestFirstSearch.reset). There are only
+        as many as player regions, so materialising them is cheap.
+
+        Yields:
+            Map: A goal state.
         """
-        return self.level.possible_goals(num)
+        return self.level.possible_goals()
     
     def actions_to(self, map: Map) -> List[SokobanAction]:
         """
@@ -83,7 +107,6 @@ class BiSokobanProblem(SokobanProblem, BiSearchProblem):
         last_map.p_undo(_action_dirs[action[0]][0], _action_dirs[action[0]][1], pull=action[1])
         return last_map
     
-    @lru_cache(maxsize=1_000_000)
     def re_heuristic(self, map: Map) -> int:
         """
         Calculates the backwards heuristic value for the given map.
@@ -95,8 +118,37 @@ class BiSokobanProblem(SokobanProblem, BiSearchProblem):
             int: The backwards heuristic value.
 
         """
-        boxes = map.locate_boxes()
-        return self._min_perfect_matching(boxes, self.init_boxes) + self._player_to_start(map)
-        
-    def _player_to_start(self, map: Map) -> int:
-        return abs(map.player_x - self.level.player_x) + abs(map.player_y - self.level.player_y)
\ No newline at end of file
+        cells = np.frombuffer(map.pack(), dtype=np.uint16)
+        # the player walks while pulling, so the two counts overlap and only the larger is a lower bound
+        return max(self._boxes_to_start(cells[1:].tobytes()), self.tables.walk[cells[0]].item())
+    
+    def counters(self) -> Dict[str, int]:
+        counters = super().counters()
+        info = BiSokobanProblem._boxes_to_start.cache_info()
+        counters["cache_hits"] += info.hits
+        counters["cache_misses"] += info.misses
+        return counters
+
+    def cache_size(self) -> int:
+        # the packed boxes, the result and the cache link
+        entry = 33 + 2 * len(self.init_boxes) + 28 + 100
+        return super().cache_size() + BiSokobanProblem._boxes_to_start.cache_info().currsize * entry
+
+    def clear_caches(self) -> None:
+        super().clear_caches()
+        BiSokobanProblem._boxes_to_start.cache_clear()
+
+    @lru_cache(maxsize=1_000_000)
+    def _boxes_to_start(self, boxes: bytes) -> int:
+        """
+        Calculates the minimum total number of pulls to bring the boxes back to their initial positions.
+
+        Args:
+            boxes (bytes): The packed cell indices of the boxes, as in Map.pack.
+
+        Returns:
+            int: The cost of the minimum perfect matching by pull distance.
+        """
+        cost_matrix = self.tables.pull[:, np.frombuffer(boxes, dtype=np.uint16)]
+        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+        return cost_matrix[row_ind, col_ind].sum().item()
@@ -0,0 +1,67 @@
+import os
+import zipfile
+from typing import Dict, List
+import numpy as np
+from sealgo.checkpoint import save_snapshot, load_snapshot
+
+CACHE_VERSION = 2 # bump when the cached tables change, so that older files are recomputed
+
+class LevelCache:
+    """
+    An on-disk cache of the analysis of levels, with one .npz file per key.
+
+    Every file records the CACHE_VERSION it was written with, and files of another version are
+    treated as missing. Loading a file refreshes its modification time, and storing a file evicts
+    the least recently used files until the cache fits its size budget.
+
+    Args:
+        folder (str): The folder of the cache files. Default is "cache/levels".
+        max_bytes (int): The size budget of the cache in bytes. Default is 256 MB.
+
+    Methods:
+        load(key: str) -> Dict[str, np.ndarray]|None: Loads the arrays of a key, None if they are not cached.
+        store(key: str, arrays: Dict[str, np.ndarray]) -> None: Caches the arrays of a key.
+        clear() -> None: Removes every cache file.
+    """
+    def __init__(self, folder: str = os.path.join("cache", "levels"), max_bytes: int = 256 * 2**20) -> None:
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.npz")
+
+    def load(self, key: str) -> Dict[str, np.ndarray]|None:
+        path = self._path(key)
+        try:
+            arrays = load_snapshot(path)
+        except (OSError, ValueError, zipfile.BadZipFile): # missing or cut short
+            return None
+        if arrays.pop("version", None) != CACHE_VERSION:
+            return None
+        os.utime(path)
+        return arrays
+
+    def store(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        save_snapshot(self._path(key), {**arrays, "version": np.array(CACHE_VERSION)})
+        self._evict(key)
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            os.remove(entry.path)
+
+    def _entries(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.folder):
+            return []
+        return [entry for entry in os.scandir(self.folder) if entry.name.endswith(".npz")]
+
+    def _evict(self, kept: str) -> None:
+        """Removes the least recently used files but the one of a key until the cache fits its size budget."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if size <= self.max_bytes:
+                break
+            if entry.path == self._path(kept): # may share its time with the file loaded last
+                continue
+            size -= entry.stat().st_size
+            os.remove(entry.path)
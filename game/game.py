@@ -4,19 +4,27 @@ import json
 import logging
 from datetime import datetime
 from copy import copy
-from typing import Dict
+from typing import Dict, List
 import math
 import numpy as np
 from ui.display import Display, State
 from ui.input_handler import InputHandler, Event
+from ui.visualizer import start_visualizer
 from generation.mcts import mcts
 from generation.generate import generate
-from sealgo.best_first_search import AStar
-from sealgo.bidirectional import BiDirectional
+from sealgo.best_first_search import AStar, ARAStar
+from sealgo.portfolio import Portfolio, SolverConfig
+from sealgo.session import SolverSession
+from sealgo.observer import SampleChannel
 
 from .problem import SokobanProblem, SokobanAction
 from .biproblem import BiSokobanProblem
 from .map import Map, Tile
+from .batch import CONFIGS, run_batch
+from .analysis import LevelTables
+from .cache import LevelCache
+from .solutions import SolutionStore
+from .solver_process import SolverProcess, PortfolioSolver, AnytimeSolver
 
 SOLUTION_DISPLAY_TIME = 5_000 # total time to display a solution of each level (ms)
 MAX_LEVEL = 20 # maximum level number
@@ -39,13 +47,18 @@ class Game:
         display (Display): The display object.
         running (bool): Flag indicating if the game is running.
         map (Map): The game map object.
+        cache (LevelCache): The on-disk cache of the level tables.
+        solutions (SolutionStore): The persistent store of the solutions found, consulted before solving.
+        solver (SolverProcess|None): The solver of the loaded level in a worker process, which reuses its searches
+            from one request to the next.
 
     Methods:
         run(self, start_level=1): Runs the game.
         test(self, end_lvl: int = 20): Runs a test on multiple levels.
     """
 
-    def __init__(self, lvl_num: int = 1, icon_style: str = "image_v1"):
+    def __init__(self, lvl_num: int = 1, icon_style: str = "image_v1", portfolio: bool = False, visualize: bool = False,
+                 time_limit: float|None = None):
         """
         Initializes the Game object.
 
@@ -54,8 +67,16 @@ class Game:
         Args:
             lvl_num (int): The initial level number. Default is 0.
             icon_style (str): The style of the game icons. Default is "image_v1".
+            portfolio (bool): Whether to solve levels by racing the CONFIGS configurations in parallel. Default is False.
+            visualize (bool): Whether to draw samples of the states expanded by the solver in a second window.
+                Not available with portfolio or a time limit. Default is False.
+            time_limit (float|None): The time budget in seconds of the anytime search (ARA*) that solves levels in
+                the game, which then plays the best solution found. Bidirectional search if None. Default is None.
         """
         self.lvl_num = lvl_num
+        self.portfolio = portfolio
+        self.time_limit = time_limit
+        self.visualize = visualize and not portfolio and time_limit is None
         self.input_handler = InputHandler(key_actions)
         self.icon_paths = {
             Tile.GOALBOX: os.path.join(assets_path, icon_style, "goalbox.png"),
@@ -68,6 +89,15 @@ class Game:
         }
         self.running = True
         self.map = Map()
+        self.cache = LevelCache()
+        self.solutions = SolutionStore()
+        self.solver: SolverProcess|None = None
+        self.channel: SampleChannel|None = None
+        self.visualizer = None
+        self._replay: List[SokobanAction] = [] # the solution played back and the index of its next move
+        self._replay_index = 0
+        self._replay_delay = 0
+        self._next_move_time = 0
         logging.info(f"Game initialized at {datetime.now()}")
 
     def _load_level(self, lvl_num: int) -> None:
@@ -79,8 +109,53 @@ class Game:
         """
         levels_folder = "levels"
         map = Map(os.path.join(levels_folder, f"level{lvl_num}.txt"))
-        self.problem = SokobanProblem(map)
+        self._set_level(map)
+
+    def _set_level(self, map: Map) -> None:
+        """
+        Sets the level played and its solver.
+
+        Args:
+            map (Map): The initial map of the level.
+        """
+        tables = LevelTables.compute(map, self.cache)
+        self.problem = SokobanProblem(map, tables)
         self.map = self.problem.initial_state()
+        self._close_level()
+        if self.portfolio:
+            self.solver = SolverProcess(PortfolioSolver(CONFIGS, self.cache))
+            return
+        if self.time_limit is not None:
+            self.solver = SolverProcess(AnytimeSolver(self.time_limit, self.cache))
+            return
+        session = SolverSession(BiSokobanProblem(map, tables), AStar, weight = 3)
+        if self.visualize:
+            self.channel = SampleChannel(len(map.pack()))
+            session.observe(self.channel)
+            self.visualizer = start_visualizer(self.channel, map.floor(), self.icon_paths)
+        self.solver = SolverProcess(session)
+
+    def _close_level(self) -> None:
+        """
+        Stops the solver and the visualizer of the level.
+        """
+        if self.solver is not None:
+            self.solver.close()
+        if self.visualizer is not None:
+            self.visualizer.terminate()
+            self.visualizer.join()
+            self.visualizer = None
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+
+    def _exit(self) -> None:
+        """
+        Stops the solver and exits the game.
+        """
+        self._close_level()
+        pygame.quit()
+        quit()
 
     def run(self):
         """
@@ -95,42 +170,93 @@ class Game:
             self._handle_event()
             clock.tick(60)
 
-    def test(self, start_lvl: int = 0, end_lvl: int = 20, b_weights: list = [np.inf]):
+    def test(self, start_lvl: int = 0, end_lvl: int = 20, configs: List[SolverConfig] = CONFIGS, time_limit: float|None = None,
+             job_timeout: float|None = None, memory_limit: int|None = None, workers: int|None = None):
         """
         Runs a test on multiple levels.
 
+        By default every level is solved with every configuration by the batch solver, which appends
+        the results to results/results.jsonl and skips the jobs already completed there.
+
         Args:
+            start_lvl (int): The first level number to test. Default is 0.
             end_lvl (int): The last level number to test. Default is 20.
+            configs (List[SolverConfig]): The search configurations to compare. Default is CONFIGS.
+            time_limit (float|None): The time budget in seconds of the anytime search for each level.
+                If given, levels are solved with ARA* instead of bidirectional search. Default is None.
+            job_timeout (float|None): The time limit in seconds of each batch job. Default is None.
+            memory_limit (int|None): The memory limit in bytes of each batch job. Default is None.
+            workers (int|None): The number of batch jobs run at once, the number of CPUs if None. Default is None.
         """
+        if time_limit is None and not self.portfolio:
+            run_batch(list(range(start_lvl, end_lvl + 1)), configs, os.path.join("results", "results.jsonl"),
+                      timeout=job_timeout, memory_limit=memory_limit, workers=workers, cache=self.cache)
+            return
         results = {}
         self.lvl_num = start_lvl
-        for b_weight in b_weights:
-            results[b_weight] = {}
-            for lvl_num in range(start_lvl, end_lvl + 1):
-                self._load_level(lvl_num)
-                start_time = os.times()
-                solutions = []
-                while len(solutions) == 0:
-                    biproblem = BiSokobanProblem(copy(self.map))
-                    ai = BiDirectional(biproblem, AStar, b_weight = b_weight, weight = 3)
-                    solutions = ai.search()
-                finish_time = os.times()
-                elapsed_time = finish_time.elapsed - start_time.elapsed
-                self.lvl_num += 1
-                logging.info(f"Level {lvl_num}: Solution found in {elapsed_time:.2f} seconds.")
-                b_factor = math.log(len(ai.f_algo.predecessors)+len(ai.b_algo.predecessors), len(solutions[0]))
-                logging.info(f"b-factor: {b_factor:.2f}")
-                lengths = [len(solution) for solution in solutions]
-                logging.info(f"Solution length: {lengths}")
-                results[b_weight][lvl_num] = {
-                    "elapsed_time": elapsed_time,
-                    "b_factor": b_factor,
-                    "length": lengths[0],
-                }
+        for lvl_num in range(start_lvl, end_lvl + 1):
+            self._load_level(lvl_num)
+            if time_limit is not None:
+                results[lvl_num] = self._test_anytime(lvl_num, time_limit)
+            else:
+                results[lvl_num] = self._test_portfolio(lvl_num)
         if not os.path.exists("results"):
             os.makedirs("results")
         with open(datetime.now().strftime(os.path.join("results","results.json")), "w") as f:
             json.dump(results, f, indent=4)
+            
+    def _test_anytime(self, lvl_num: int, time_limit: float) -> Dict:
+        """
+        Solves the loaded level with ARA* under a time budget.
+
+        Args:
+            lvl_num (int): The level number being tested.
+            time_limit (float): The time budget in seconds.
+
+        Returns:
+            Dict: The result of the best solution found within the budget.
+        """
+        start_time = os.times()
+        ai = ARAStar(SokobanProblem(copy(self.map), self.problem.tables, symmetry=True), weight=3, time_limit=time_limit)
+        result = {"elapsed_time": None, "b_factor": None, "length": None, "bound": None}
+        for solution, bound in ai.solutions():
+            elapsed_time = os.times().elapsed - start_time.elapsed
+            logging.info(f"Level {lvl_num}: Solution of length {len(solution)} (bound {bound:.2f}) found in {elapsed_time:.2f} seconds.")
+            result = {
+                "elapsed_time": elapsed_time,
+                "b_factor": math.log(len(ai.nodes), len(solution)) if len(ai.nodes) and len(solution) > 1 else None,
+                "length": len(solution),
+                "bound": bound,
+            }
+        if result["length"] is None:
+            logging.warning(f"Level {lvl_num}: No solution found in {time_limit:.2f} seconds.")
+        self.lvl_num += 1
+        return result
+
+    def _test_portfolio(self, lvl_num: int) -> Dict:
+        """
+        Solves the loaded level by racing the CONFIGS configurations.
+
+        Args:
+            lvl_num (int): The level number being tested.
+
+        Returns:
+            Dict: The result of the first solution found, with the winner and the results of every configuration.
+        """
+        start_time = os.times()
+        tables = LevelTables.share(self.map, self.cache)
+        try:
+            ai = Portfolio(BiSokobanProblem(copy(self.map), tables), CONFIGS)
+            solutions = ai.search()
+        finally:
+            tables.release()
+        elapsed_time = os.times().elapsed - start_time.elapsed
+        self.lvl_num += 1
+        if len(solutions) == 0:
+            logging.warning(f"Level {lvl_num}: No configuration found a solution.")
+            return {"elapsed_time": elapsed_time, "length": None, "winner": None, "results": ai.results}
+        logging.info(f"Level {lvl_num}: Solution found by {ai.winner} in {elapsed_time:.2f} seconds.")
+        return {"elapsed_time": elapsed_time, "length": len(solutions[0]), "winner": ai.winner, "results": ai.results}
 
     def _handle_event(self):
         """
@@ -150,7 +276,9 @@ class Game:
             case State.GENERATING:
                 self._handle_generating()
             case State.SOLVING:
-                self._handle_solving()
+                self._handle_solving(input)
+            case State.REPLAYING:
+                self._handle_replaying(input)
             case _:
                 raise ValueError(f"Invalid state: {self.display.state}")
 
@@ -168,8 +296,7 @@ class Game:
             case Event.GENERATE:
                 self.display.state = State.GENERATING
             case Event.EXIT:
-                pygame.quit()
-                quit()
+                self._exit()
 
     def _handle_main_menu(self, input: Event) -> None:
         """
@@ -187,8 +314,7 @@ class Game:
                 self.map = self.problem.initial_state()
                 self.display.state = State.GAMING
             case Event.EXIT:
-                pygame.quit()
-                quit()
+                self._exit()
 
     def _handle_gaming(self, input: SokobanAction) -> None:
         """
@@ -208,8 +334,7 @@ class Game:
             case Event.PAUSE:
                 self.display.state = State.MAIN_MENU
             case Event.EXIT:
-                pygame.quit()
-                quit()
+                self._exit()
 
     def _handle_victory_menu(self, input: Event) -> None:
         """
@@ -226,41 +351,83 @@ class Game:
                 self._load_level(self.lvl_num)
                 self.display.state = State.GAMING
             case Event.EXIT:
-                pygame.quit()
-                quit()
+                self._exit()
     
-    def _handle_solving(self) -> None:
+    def _handle_solving(self, input: Event) -> None:
         """
         Handles solving events.
+
+        The solver runs in a worker process, whose progress is shown until the solution is found,
+        and the solution is then played back (see _handle_replaying).
+
+        Args:
+            input (Event): The event to handle.
         """
-        current_map = copy(self.map)
-        biproblem = BiSokobanProblem(self.map)
-        ai = BiDirectional(biproblem, AStar, b_weight = np.inf, weight = 3)
-        solutions = ai.search()
+        match input:
+            case Event.PAUSE:
+                self.solver.cancel()
+                self.display.state = State.MAIN_MENU
+                return
+            case Event.EXIT:
+                self._exit()
+        if not self.solver.solving:
+            stored = self.solutions.lookup(self.map)
+            if stored is None:
+                self.solver.solve(copy(self.map))
+                self.display.progress = {}
+                return
+            logging.info(f"Stored solution for Level{self.lvl_num}")
+            solutions = [stored]
+        else:
+            solutions = self.solver.poll()
+            self.display.progress = self.solver.progress
+            if solutions is None:
+                return
+            if len(solutions) > 0:
+                self.solutions.store(self.map, solutions[0])
         if len(solutions) == 0:
             logging.warning(f"Failed to find a solution for {self.lvl_num}")
-            print("Failed to find a solution")
             self.display.state = State.MAIN_MENU
-        else:
-            while len(solutions) > 0:
-                self.map = copy(current_map)
-                solution = solutions.pop(0)
-                delay = SOLUTION_DISPLAY_TIME // len(solution)
-                logging.info(f"Solution for Level{self.lvl_num}: {solution}")
-                for action in solution:
-                    self.map = self.problem.result(self.map, action)
-                    self.display.render(self.map)
-                    pygame.time.wait(delay)
-            assert self.problem.is_goal(self.map), "Invalid solution"
-            self.display.state = State.VICTORY_MENU
+            return
+        self._replay = solutions[0]
+        self._replay_index = 0
+        self._replay_delay = SOLUTION_DISPLAY_TIME // max(len(self._replay), 1) # an already solved state has an empty solution
+        self._next_move_time = pygame.time.get_ticks()
+        logging.info(f"Solution for Level{self.lvl_num}: {self._replay}")
+        self.display.state = State.REPLAYING
+
+    def _handle_replaying(self, input: Event) -> None:
+        """
+        Handles replaying events.
+
+        The solution is played back one move per frame once the delay of the previous move has passed,
+        so that the events are still handled. Pausing stops the playback at the current move.
+
+        Args:
+            input (Event): The event to handle.
+        """
+        match input:
+            case Event.PAUSE:
+                self.display.state = State.MAIN_MENU
+                return
+            case Event.EXIT:
+                self._exit()
+        if pygame.time.get_ticks() < self._next_move_time:
+            return
+        if self._replay_index < len(self._replay):
+            self.map = self.problem.result(self.map, self._replay[self._replay_index])
+            self._replay_index += 1
+            self._next_move_time += self._replay_delay
+            return
+        assert self.problem.is_goal(self.map), "Invalid solution"
+        self.display.state = State.VICTORY_MENU
             
     def _handle_generating(self) -> None:
         """
         Handles generating events.
         """
         state= generate()
-        self.problem = SokobanProblem(state.show_map)
-        self.map = state.show_map
-        self.map.locate_player()
+        state.show_map.locate_player()
+        self._set_level(state.show_map)
         self.display.state = State.GAMING
         
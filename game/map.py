@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Set, Generator
 import numpy as np
 from enum import Enum, auto
 from copy import copy
@@ -79,6 +79,11 @@ class Map:
         p_move(self, dx: int, dy: int) -> "Map": Moves the player in a given direction.
         can_push(self, x: int, y: int, dx: int, dy: int) -> bool: Checks if a box can be pushed.
         count_deadlock(self, _boxes: np.ndarray) -> int: Counts the number of boxes in deadlock.
+        floor(self) -> "Map": Returns a copy of the map without the player and boxes.
+        pack(self) -> bytes: Packs the player and box positions into a compact key.
+        unpack(self, key: bytes) -> "Map": Places the player and boxes of a compact key on a floor map.
+        possible_goals(self) -> Generator["Map"]: Generates the distinct goal states of the map.
+        reachable(self, x: int, y: int) -> Set[Pos]: Finds the cells the player can walk to from a cell.
     """
     def __init__(self, level_file: str = ''):
         """
@@ -386,6 +391,55 @@ class Map:
             boxes = np.delete(boxes, to_delete, axis=0)
         return boxes.shape[0]
     
+    def floor(self) -> "Map":
+        """
+        Returns a copy of the map without the player and boxes, keeping walls and goals.
+
+        Returns:
+            Map: The floor map.
+        """
+        floor = copy(self)
+        floor.tiles[(floor.tiles == Tile.BOX) | (floor.tiles == Tile.PLAYER)] = Tile.SPACE
+        floor.tiles[(floor.tiles == Tile.GOALBOX) | (floor.tiles == Tile.GOALPLAYER)] = Tile.GOAL
+        return floor
+    
+    def pack(self) -> bytes:
+        """
+        Packs the player and box positions into a compact key.
+        
+        The key holds the flat cell index of the player followed by the sorted flat cell indices
+        of the boxes as uint16, so two maps with the same walls and goals are equal iff their keys are.
+
+        Returns:
+            bytes: The compact key of the map.
+        """
+        flat = self.tiles.reshape(-1)
+        boxes = np.flatnonzero((flat == Tile.BOX) | (flat == Tile.GOALBOX))
+        cells = np.empty(len(boxes) + 1, dtype=np.uint16)
+        cells[0] = self.player_x * self.scale[1] + self.player_y
+        cells[1:] = boxes
+        return cells.tobytes()
+    
+    def unpack(self, key: bytes) -> "Map":
+        """
+        Places the player and boxes of a compact key on a copy of this floor map.
+
+        Args:
+            key (bytes): The compact key created by pack().
+
+        Returns:
+            Map: The map represented by the key.
+        """
+        cells = np.frombuffer(key, dtype=np.uint16)
+        new_map = copy(self)
+        flat = new_map.tiles.reshape(-1)
+        for cell in cells[1:]:
+            flat[cell] = Tile.GOALBOX if flat[cell] == Tile.GOAL else Tile.BOX
+        player = int(cells[0])
+        flat[player] = Tile.GOALPLAYER if flat[player] == Tile.GOAL else Tile.PLAYER
+        new_map.player_x, new_map.player_y = divmod(player, self.scale[1])
+        return new_map
+    
     def player_to_boxes(self, boxes) -> int:
         """
         Calculates the minimum cost for the player to reach the boxes.
@@ -424,37 +478,54 @@ class Map:
             distances = np.abs(pos1[:, np.newaxis, :] - pos2[np.newaxis, :, :])
             return distances.sum(axis=2)
     
-    def possible_goals(self, num: int = 10) -> List["Map"]:
-            """
-            Returns a list of possible goal states after moving the player and boxes in different directions.
+    def possible_goals(self) -> Generator["Map", None, None]:
+        """
+        Generates the distinct goal states of the map lazily.
 
-            Args:
-                num (int): The maximum number of possible goals to generate. Defaults to 10.
+        In a goal state every goal holds a box, and the player stands in one of the connected regions
+        of free cells next to the boxes. Positions within a region are interchangeable by walking,
+        so one goal state is generated per region, with the player on its first cell.
 
-            Returns:
-                List["Map"]: A list of Map objects representing the possible goal states.
-            """
-            goal_map = copy(self)
-            if goal_map.is_goal(goal_map.player_x, goal_map.player_y) == Tile.GOALPLAYER:
-                goal_map.set_tile(goal_map.player_x, goal_map.player_y, Tile.GOAL)
-            else:
-                goal_map.set_tile(goal_map.player_x, goal_map.player_y, Tile.SPACE)
-            goal_map.tiles[goal_map.tiles == Tile.BOX] = Tile.SPACE
-            goal_map.tiles[goal_map.tiles == Tile.GOAL] = Tile.GOALBOX
-            boxes = goal_map.locate_boxes()
-            goals = []
-            n = 0
+        Yields:
+            Map: A goal state for each player region next to a box.
+        """
+        goal_map = self.floor()
+        goal_map.tiles[goal_map.tiles == Tile.GOAL] = Tile.GOALBOX
+        width = self.scale[1]
+        seen = set()
+        for box in goal_map.locate_boxes():
             for dir in dirs:
-                for box in boxes:
-                    if goal_map.is_space(box[0]+dir[0], box[1]+dir[1]):
-                        if n > num:
-                            break
-                        n += 1
-                        new_map = copy(goal_map)
-                        new_map.set_tile(box[0]+dir[0], box[1]+dir[1], Tile.PLAYER)
-                        new_map.locate_player()
-                        goals.append(new_map)
-            return goals
+                x, y = int(box[0])+dir[0], int(box[1])+dir[1]
+                if (x, y) in seen or goal_map.is_blocked(x, y):
+                    continue
+                region = goal_map.reachable(x, y)
+                seen.update(region)
+                new_map = copy(goal_map)
+                new_map.player_x, new_map.player_y = min(region, key=lambda pos: pos[0] * width + pos[1])
+                new_map.set_tile(new_map.player_x, new_map.player_y, Tile.PLAYER)
+                yield new_map
+
+    def reachable(self, x: int, y: int) -> Set[Pos]:
+        """
+        Finds the cells the player can walk to from a cell without pushing boxes.
+
+        Args:
+            x (int): The x-coordinate of the cell.
+            y (int): The y-coordinate of the cell.
+
+        Returns:
+            Set[Pos]: The reachable cells, including the given one.
+        """
+        region = {(x, y)}
+        stack = [(x, y)]
+        while stack:
+            x, y = stack.pop()
+            for dx, dy in dirs:
+                pos = (x+dx, y+dy)
+                if pos not in region and not self.is_blocked(*pos):
+                    region.add(pos)
+                    stack.append(pos)
+        return region
         
     def can_pull(self, x, y, dx, dy) -> bool:
         """
@@ -1,12 +1,15 @@
 from enum import Enum, auto
-from typing import TypeAlias, List
+from typing import TypeAlias, Dict, List
 from functools import lru_cache
 from copy import copy
 import numpy as np
 from scipy.optimize import linear_sum_assignment
 from sealgo.problem import HeuristicSearchProblem, Action
+from sealgo import probes
 
 from .map import Map
+from .analysis import LevelTables
+from .symmetry import symmetries, canonical_key
 
 class SokobanAction(Enum):
     UP = auto()
@@ -37,20 +40,37 @@ class SokobanProblem(HeuristicSearchProblem):
     - result(self, map: State, action: Action) -> State: Returns the resulting state after taking an action.
     - is_goal(self, map: State): Checks if the given state is a goal state.
     - step_cost(self, map: State, action: Action): Returns the cost of taking an action in a given state.
+    - encode(self, map: State) -> bytes: Returns the compact key of a given state.
+    - decode(self, key: bytes) -> State: Returns the state of a given compact key.
+    - canonical(self, key: bytes) -> bytes: Returns the representative of a compact key under the symmetries of the level.
+    - counters(self) -> Dict[str, int]: Returns the heuristic cache hits and misses and the number of deadlocks found.
+    - cache_size(self) -> int: Returns the approximate memory used by the heuristic cache.
+    - clear_caches(self) -> None: Empties the heuristic cache.
     """
 
     State: TypeAlias = Map
     Action = SokobanAction
     
-    def __init__(self, init_state: Map):
+    def __init__(self, init_state: Map, tables: LevelTables|None = None, symmetry: bool = False):
         """
         Initializes the SokobanProblem object with a level path.
 
         Args:
         - level_path: The path to the level file.
+        - tables: The precomputed tables of the level, computed if None (see LevelTables.share to share them).
+        - symmetry: Whether searches keep one node per class of states symmetric under the rotations and
+          reflections that keep the walls and goals (see game.symmetry).
 
         """
         self.level = init_state
+        self.floor = init_state.floor()
+        self.tables = LevelTables.compute(init_state) if tables is None else tables
+        self.symmetry = symmetry
+        self.permutations = symmetries(init_state) if symmetry else None
+        self.deadlocks = 0
+        probes.instrument(self, "heuristic", "SokobanProblem.heuristic")
+        # maps are copied for every state, so their probe is set on the class
+        probes.instrument(Map, "count_deadlock", "Map.count_deadlock")
         
     def __copy__(self) -> "SokobanProblem":
         """
@@ -60,7 +80,7 @@ class SokobanProblem(HeuristicSearchProblem):
         - A copy of the SokobanProblem object.
 
         """
-        return SokobanProblem(copy(self.level))
+        return SokobanProblem(copy(self.level), self.tables, self.symmetry)
         
     def initial_state(self) -> State:
         """
@@ -126,6 +146,65 @@ class SokobanProblem(HeuristicSearchProblem):
         """
         return map.is_all_boxes_in_place()
     
+    def encode(self, map: State) -> bytes:
+        """
+        Returns the compact key of a given state.
+
+        Args:
+        - map: The state to be encoded.
+
+        Returns:
+        - The player and box positions packed as bytes.
+
+        """
+        return map.pack()
+    
+    def decode(self, key: bytes) -> State:
+        """
+        Returns the state of a given compact key.
+
+        Args:
+        - key: The compact key created by encode.
+
+        Returns:
+        - The state represented by the key.
+
+        """
+        return self.floor.unpack(key)
+    
+    def canonical(self, key: bytes) -> bytes:
+        """
+        Returns the representative of a compact key under the symmetries of the level.
+
+        Args:
+        - key: The compact key created by encode.
+
+        Returns:
+        - The smallest key of the symmetric states, the key itself without symmetry.
+
+        """
+        if self.permutations is None or len(self.permutations) == 1:
+            return key
+        return canonical_key(key, self.permutations)
+    
+    def counters(self) -> Dict[str, int]:
+        """
+        Returns the running counters of the problem (see SearchStats).
+
+        Returns:
+        - The hits and misses of the heuristic cache, shared by all problems, and the number of deadlocks found.
+
+        """
+        info = SokobanProblem.heuristic.cache_info()
+        return {"cache_hits": info.hits, "cache_misses": info.misses, "deadlocks": self.deadlocks}
+    
+    def cache_size(self) -> int:
+        # each entry holds on to its map: the tiles, the Map and array objects and the cache link
+        return SokobanProblem.heuristic.cache_info().currsize * (self.level.tiles.nbytes + 400)
+    
+    def clear_caches(self) -> None:
+        SokobanProblem.heuristic.cache_clear()
+    
     def step_cost(self, map: State, action: Action):
         """
         Returns the cost of taking an action in a given state.
@@ -182,4 +261,12 @@ class SokobanProblem(HeuristicSearchProblem):
         Returns:
             int: The punishment value. Returns 50 if the current state is a deadlock, otherwise returns 0.
         """
-        return 50 if map.count_deadlock(boxes) else 0
+        cells = boxes[:, 0] * map.scale[1] + boxes[:, 1]
+        occupied = np.zeros(map.tiles.size + 1, dtype=bool)
+        occupied[cells] = True
+        occupied[-1] = True # the wall cells of the freeze patterns
+        frozen = np.all(occupied[self.tables.patterns], axis=1).any()
+        if self.tables.dead[cells].any() or frozen or map.count_deadlock(boxes):
+            self.deadlocks += 1
+            return 50
+        return 0
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from typing import List
+from copy import copy
+
+from .map import Map
+from .problem import SokobanAction, _action_dirs
+from .analysis import floor_hash
+
+_action_codes = {action: action.name[0] for action in SokobanAction} # U, D, L or R
+_code_actions = {code: action for action, code in _action_codes.items()}
+
+class SolutionStore:
+    """
+    A persistent store of solutions in a SQLite file.
+
+    Solutions are kept as packed action strings. Every state along a stored solution is indexed by
+    its key, the hash of the walls and goals followed by the packed player and box positions
+    (see Map.pack), with the solution and the offset of the state in it. A lookup of any state on a
+    stored path returns the rest of the path, and the shortest one when several paths cross it.
+
+    Args:
+        path (str): The path of the SQLite file. Default is "cache/solutions.sqlite".
+
+    Methods:
+        lookup(map: Map) -> List[SokobanAction]|None: Returns a stored solution from a state, None if there is none.
+        store(map: Map, solution: List[SokobanAction]) -> None: Stores a solution from a state.
+        close() -> None: Closes the database.
+    """
+    def __init__(self, path: str = os.path.join("cache", "solutions.sqlite")) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (id INTEGER PRIMARY KEY, actions TEXT NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS states (key BLOB PRIMARY KEY, solution INTEGER NOT NULL, "
+                                    "offset INTEGER NOT NULL, remaining INTEGER NOT NULL)")
+
+    @staticmethod
+    def _key(map: Map, floor: bytes) -> bytes:
+        return floor + map.pack()
+
+    def lookup(self, map: Map) -> List[SokobanAction]|None:
+        row = self.connection.execute(
+            "SELECT actions, offset FROM states JOIN solutions ON solutions.id = states.solution WHERE key = ?",
+            (self._key(map, bytes.fromhex(floor_hash(map))),)).fetchone()
+        if row is None:
+            return None
+        actions, offset = row
+        return [_code_actions[code] for code in actions[offset:]]
+
+    def store(self, map: Map, solution: List[SokobanAction]) -> None:
+        actions = [action for action in solution if action in _action_codes] # without the Action.STAY of the roots
+        floor = bytes.fromhex(floor_hash(map))
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO solutions (actions) VALUES (?)",
+                                             ("".join(_action_codes[action] for action in actions),))
+            states, state = [], copy(map)
+            for offset, action in enumerate(actions):
+                states.append((self._key(state, floor), cursor.lastrowid, offset, len(actions) - offset))
+                state = state.p_move(*_action_dirs[action])
+            # keep the shortest way to the goal from every state
+            self.connection.executemany(
+                "INSERT INTO states VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET solution = excluded.solution, "
+                "offset = excluded.offset, remaining = excluded.remaining WHERE excluded.remaining < states.remaining",
+                states)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,170 @@
+import sys
+import signal
+import logging
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List
+from sealgo.problem import Action
+from sealgo.best_first_search import ARAStar
+from sealgo.portfolio import Portfolio, SolverConfig
+from sealgo.session import SolverSession
+from sealgo import probes
+
+from .map import Map
+from .biproblem import BiSokobanProblem
+from .problem import SokobanProblem
+from .analysis import LevelTables
+from .cache import LevelCache
+
+class PortfolioSolver:
+    """
+    Solves states by racing search configurations (see Portfolio), like a SolverSession.
+
+    The racing processes do not report their progress.
+
+    Args:
+        configs (List[SolverConfig]): The configurations to race.
+        cache (LevelCache|None): The on-disk cache of the level tables. Default is None.
+    """
+    def __init__(self, configs: List[SolverConfig], cache: LevelCache|None = None) -> None:
+        self.configs = configs
+        self.cache = cache
+
+    def report(self, callback: Callable[[Dict[str, float]], None], every: int = 1000) -> None:
+        pass
+
+    def solve(self, state: Map) -> List[List[Action]]:
+        tables = LevelTables.share(state, self.cache)
+        try:
+            ai = Portfolio(BiSokobanProblem(state, tables), self.configs)
+            solutions = ai.search()
+        finally:
+            tables.release()
+        logging.info(f"Portfolio results: {ai.results}")
+        return solutions
+
+class AnytimeSolver:
+    """
+    Solves states with anytime search (see ARAStar) under a time budget, like a SolverSession.
+
+    The progress is reported after each improved solution, with its length and suboptimality bound,
+    and the best solution found within the budget is returned.
+
+    Args:
+        time_limit (float): The time budget of each request in seconds.
+        cache (LevelCache|None): The on-disk cache of the level tables. Default is None.
+        weight (float|int): The initial weight of the heuristic. Default is 3.
+    """
+    def __init__(self, time_limit: float, cache: LevelCache|None = None, weight: float|int = 3) -> None:
+        self.time_limit = time_limit
+        self.cache = cache
+        self.weight = weight
+        self.report_callback: Callable[[Dict[str, float]], None]|None = None
+
+    def report(self, callback: Callable[[Dict[str, float]], None], every: int = 1000) -> None:
+        self.report_callback = callback
+
+    def solve(self, state: Map) -> List[List[Action]]:
+        ai = ARAStar(SokobanProblem(state, LevelTables.compute(state, self.cache), symmetry=True),
+                     weight=self.weight, time_limit=self.time_limit)
+        best = None
+        for solution, bound in ai.solutions():
+            best = solution
+            logging.info(f"Anytime solution of length {len(solution)} (bound {bound:.2f})")
+            if self.report_callback is not None:
+                self.report_callback({"expanded": ai.expanded, "frontier": ai.frontier.qsize(),
+                                      "length": len(solution), "bound": round(float(bound), 2)})
+        return [] if best is None else [best]
+
+class SolverProcess:
+    """
+    Runs a solver in a worker process, so that the game loop keeps running while it searches.
+
+    The worker keeps the solver between requests, so a SolverSession reuses its earlier searches.
+    While a request is solved, the worker sends the progress of the search, which is picked up by
+    poll. Cancelling a request kills the worker, and the next request starts a new one. If profiling
+    is enabled (see sealgo.probes), the worker sends the probe report of each request before its solutions.
+
+    Args:
+        solver (SolverSession|PortfolioSolver|AnytimeSolver): The solver of the level.
+        every (int): The number of expansions between progress messages. Default is 1000.
+
+    Attributes:
+        progress (Dict[str, float]): The last progress of the current request (see BestFirstSearch._progress).
+        solving (bool): Whether a request is being solved.
+
+    Methods:
+        solve(state: Map) -> None: Starts solving a state.
+        poll() -> List[List[Action]]|None: Returns the solutions of the request once it is solved, None before.
+        cancel() -> None: Stops solving the current request.
+        close() -> None: Stops the worker.
+    """
+    def __init__(self, solver: SolverSession|PortfolioSolver|AnytimeSolver, every: int = 1000) -> None:
+        self.solver = solver
+        self.every = every
+        self.progress: Dict[str, float] = {}
+        self.solving = False
+        self._process: Process|None = None
+        self._requests: Connection|None = None
+        self._replies: Connection|None = None
+
+    def solve(self, state: Map) -> None:
+        if self._process is None:
+            self._replies, replies = Pipe(duplex=False)
+            requests, self._requests = Pipe(duplex=False)
+            # not a daemon, so that a portfolio can start its own processes
+            self._process = Process(target=_serve, args=(self.solver, self.every, requests, replies))
+            self._process.start()
+            requests.close()
+            replies.close()
+        self.progress = {}
+        self.solving = True
+        self._requests.send(state)
+
+    def poll(self) -> List[List[Action]]|None:
+        if not self.solving:
+            return None
+        while self._replies.poll():
+            try:
+                kind, content = self._replies.recv()
+            except EOFError: # the worker died
+                self.close()
+                return []
+            if kind == "progress":
+                self.progress = content
+            elif kind == "probes":
+                probes.merge(content)
+            else:
+                self.solving = False
+                return content
+        return None
+
+    def cancel(self) -> None:
+        if self.solving:
+            self.close()
+
+    def close(self) -> None:
+        self.solving = False
+        if self._process is None:
+            return
+        self._process.terminate()
+        self._process.join()
+        self._requests.close()
+        self._replies.close()
+        self._process = None
+
+def _serve(solver: SolverSession|PortfolioSolver|AnytimeSolver, every: int, requests: Connection, replies: Connection) -> None:
+    """Solves the requested states in the worker process until its pipe is closed."""
+    # exit through the finally blocks on terminate, so that a portfolio stops its processes
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    solver.report(lambda progress: replies.send(("progress", progress)), every)
+    while True:
+        try:
+            state = requests.recv()
+        except EOFError:
+            return
+        solutions = solver.solve(state)
+        if probes.enabled():
+            replies.send(("probes", probes.report()))
+            probes.reset()
+        replies.send(("solutions", solutions))
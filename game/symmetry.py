@@ -0,0 +1,62 @@
+from typing import Callable, List
+import numpy as np
+
+from .map import Map
+
+# the symmetries of a rectangle, then those that only keep a square
+_rectangle: List[Callable[[np.ndarray], np.ndarray]] = [
+    lambda a: a,
+    np.flipud,
+    np.fliplr,
+    lambda a: np.rot90(a, 2),
+]
+_square: List[Callable[[np.ndarray], np.ndarray]] = [
+    np.transpose,
+    lambda a: np.rot90(a, 2).T,
+    lambda a: np.rot90(a, 1),
+    lambda a: np.rot90(a, 3),
+]
+
+def symmetries(level: Map) -> np.ndarray:
+    """
+    Finds the symmetry group of the walls and goals of a level.
+
+    The candidates are the rotations and reflections of the grid, and a symmetry maps every wall
+    to a wall and every goal to a goal. Player and boxes are ignored, so that the group acts on
+    every state of the level and keeps the goal test and the heuristic.
+
+    Args:
+        level (Map): The map of the level.
+
+    Returns:
+        np.ndarray: The k*n array of the cell permutations of the k symmetries, by flat cell index,
+            the identity first.
+    """
+    floor = level.floor().tiles
+    height, width = level.scale
+    cells = np.arange(floor.size).reshape(height, width)
+    transforms = _rectangle + (_square if height == width else [])
+    permutations = []
+    for transform in transforms:
+        if not np.array_equal(transform(floor), floor):
+            continue
+        # the cell moved to each position, inverted into the position of each cell
+        permutation = np.empty(floor.size, dtype=np.uint16)
+        permutation[transform(cells).reshape(-1)] = np.arange(floor.size, dtype=np.uint16)
+        permutations.append(permutation)
+    return np.stack(permutations)
+
+def canonical_key(key: bytes, permutations: np.ndarray) -> bytes:
+    """
+    Returns the representative of the symmetry class of a packed key (see Map.pack).
+
+    Args:
+        key (bytes): The packed player and box positions.
+        permutations (np.ndarray): The cell permutations of the symmetry group (see symmetries).
+
+    Returns:
+        bytes: The smallest of the keys of the symmetric states.
+    """
+    cells = permutations[:, np.frombuffer(key, dtype=np.uint16)]
+    cells[:, 1:].sort(axis=1)
+    return min(row.tobytes() for row in cells)
@@ -0,0 +1,187 @@
+import os
+import re
+from typing import List, Tuple
+import numpy as np
+
+from .map import Map, Tile
+from .problem import SokobanAction, _action_dirs
+
+# tiles are stored as their enum values, with Tile(0) unused
+_TILES = np.array([None] + list(Tile), dtype=object)
+_DIRS = np.array([_action_dirs[action] for action in SokobanAction], dtype=np.int64)
+
+WALL, BOX, GOALBOX, GOALPLAYER, GOAL, PLAYER, SPACE = (tile.value for tile in
+    (Tile.WALL, Tile.BOX, Tile.GOALBOX, Tile.GOALPLAYER, Tile.GOAL, Tile.PLAYER, Tile.SPACE))
+
+def _table(mapping: dict) -> np.ndarray:
+    """Returns a lookup table of tile values, mapping the other values to themselves."""
+    table = np.arange(len(_TILES), dtype=np.uint8)
+    for old, new in mapping.items():
+        table[old] = new
+    return table
+
+_LEAVE = _table({PLAYER: SPACE, GOALPLAYER: GOAL})                            # the player walks off
+_ENTER = _table({SPACE: PLAYER, GOAL: GOALPLAYER, BOX: PLAYER, GOALBOX: GOALPLAYER}) # the player walks on
+_PUSH = _table({SPACE: BOX, GOAL: GOALBOX})                                   # a box is pushed on
+_FREE = np.isin(np.arange(len(_TILES)), [SPACE, GOAL])
+_BOXES = np.isin(np.arange(len(_TILES)), [BOX, GOALBOX])
+
+def encode(map: Map) -> np.ndarray:
+    """
+    Converts the tiles of a map to an array of their enum values.
+
+    Args:
+        map (Map): The map to convert.
+
+    Returns:
+        np.ndarray: The uint8 tile values of the map.
+    """
+    return np.frompyfunc(lambda tile: tile.value, 1, 1)(map.tiles).astype(np.uint8)
+
+def load_pack(folder: str = "levels") -> List[Map]:
+    """
+    Loads every level of a folder, in the order of their numbers.
+
+    Args:
+        folder (str): The folder of the level files. Default is "levels".
+
+    Returns:
+        List[Map]: The levels.
+    """
+    names = [name for name in os.listdir(folder) if re.fullmatch(r"level\d+\.txt", name)]
+    names.sort(key=lambda name: int(name[5:-4]))
+    return [Map(os.path.join(folder, name)) for name in names]
+
+class VecSokobanEnv:
+    """
+    Steps many Sokoban boards at once, for training agents.
+
+    The boards are stacked in one uint8 array of tile values (see Tile), padded with walls to the
+    size of the largest level, and a step applies one action to every board with array indexing.
+    The moves follow Map.p_move, and an action that SokobanProblem.actions would not allow leaves
+    the board as it is. A board is done when all of its boxes are on goals or after `max_steps`
+    steps, and is then reset to a random level of the pack, so the observations returned for it
+    are those of the new level.
+
+    The rewards are a penalty on every step, a reward for each box pushed onto a goal (and its
+    negative for each box pushed off one) and a reward for solving the board.
+
+    Args:
+        levels (List[Map]): The level pack the boards are drawn from (see load_pack).
+        num_envs (int): The number of boards.
+        max_steps (int): The number of steps after which a board is done. Default is 200.
+        seed (int|None): The seed of the choice of levels. Default is None.
+
+    Attributes:
+        obs (np.ndarray): The tile values of the boards, of shape (num_envs, height, width), updated in place
+            by the steps, which return copies of it.
+        players (np.ndarray): The row and column of the player on each board, of shape (num_envs, 2).
+        level_ids (np.ndarray): The index in the pack of the level of each board.
+        steps (np.ndarray): The number of steps taken on each board since its reset.
+
+    Methods:
+        reset() -> np.ndarray: Resets every board to a random level.
+        step(actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Applies an action to every board.
+        to_map(env: int) -> Map: Returns a board as a map.
+    """
+    STEP_PENALTY = -0.1
+    BOX_REWARD = 1.0
+    SOLVED_REWARD = 10.0
+
+    def __init__(self, levels: List[Map], num_envs: int, max_steps: int = 200, seed: int|None = None) -> None:
+        self.levels = levels
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        height = max(level.scale[0] for level in levels)
+        width = max(level.scale[1] for level in levels)
+        self._boards = np.full((len(levels), height, width), WALL, dtype=np.uint8)
+        for i, level in enumerate(levels):
+            self._boards[i, :level.scale[0], :level.scale[1]] = encode(level)
+        self._players = np.array([(level.player_x, level.player_y) for level in levels], dtype=np.int64)
+        self._remaining = (self._boards == BOX).sum(axis=(1, 2))
+        self.obs = np.empty((num_envs, height, width), dtype=np.uint8)
+        self.players = np.empty((num_envs, 2), dtype=np.int64)
+        self.level_ids = np.empty(num_envs, dtype=np.int64)
+        self.steps = np.empty(num_envs, dtype=np.int64)
+        self._left = np.empty(num_envs, dtype=np.int64) # boxes off goals
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """
+        Resets every board to a random level of the pack.
+
+        Returns:
+            np.ndarray: A copy of the observations of the boards.
+        """
+        self._reset(np.arange(self.num_envs))
+        return self.obs.copy()
+
+    def _reset(self, envs: np.ndarray) -> None:
+        """Resets some boards to random levels of the pack."""
+        ids = self.rng.integers(len(self.levels), size=len(envs))
+        self.level_ids[envs] = ids
+        self.obs[envs] = self._boards[ids]
+        self.players[envs] = self._players[ids]
+        self._left[envs] = self._remaining[ids]
+        self.steps[envs] = 0
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies an action to every board, resetting the boards that are done.
+
+        Args:
+            actions (np.ndarray): The action of each board, the index of a SokobanAction (UP, DOWN, LEFT, RIGHT).
+
+        Returns:
+            np.ndarray: A copy of the observations of the boards, after the resets.
+            np.ndarray: The reward of each board.
+            np.ndarray: Whether each board is done and was reset.
+            np.ndarray: Whether each board was solved, as opposed to running out of steps.
+        """
+        envs = np.arange(self.num_envs)
+        dirs = _DIRS[actions]
+        height, width = self.obs.shape[1:]
+        row, col = self.players[:, 0], self.players[:, 1]
+        row1, col1 = row + dirs[:, 0], col + dirs[:, 1]
+        # the cell beyond only matters behind a box, which walls keep inside the board
+        row2, col2 = np.clip(row1 + dirs[:, 0], 0, height - 1), np.clip(col1 + dirs[:, 1], 0, width - 1)
+        next1 = self.obs[envs, row1, col1]
+        next2 = self.obs[envs, row2, col2]
+        push = _BOXES[next1] & _FREE[next2]
+        move = _FREE[next1] | push
+
+        moved = envs[move]
+        self.obs[moved, row[move], col[move]] = _LEAVE[self.obs[moved, row[move], col[move]]]
+        self.obs[moved, row1[move], col1[move]] = _ENTER[next1[move]]
+        pushed = envs[push]
+        self.obs[pushed, row2[push], col2[push]] = _PUSH[next2[push]]
+        self.players[move] += dirs[move]
+
+        onto = push & (next2 == GOAL)
+        off = push & (next1 == GOALBOX)
+        self._left += off.astype(np.int64) - onto
+        self.steps += 1
+        solved = self._left == 0
+        done = solved | (self.steps >= self.max_steps)
+        rewards = self.STEP_PENALTY + self.BOX_REWARD * (onto.astype(np.float64) - off) + self.SOLVED_REWARD * solved
+        if done.any():
+            self._reset(envs[done])
+        return self.obs.copy(), rewards, done, solved
+
+    def to_map(self, env: int) -> Map:
+        """
+        Returns a board as a map.
+
+        Args:
+            env (int): The index of the board.
+
+        Returns:
+            Map: The map of the board, without the padding.
+        """
+        height, width = self.levels[self.level_ids[env]].scale
+        map = Map()
+        map.tiles = _TILES[self.obs[env, :height, :width]]
+        map.scale = map.tiles.shape
+        map.player_x, map.player_y = (int(x) for x in self.players[env])
+        return map
@@ -1,9 +1,12 @@
 import argparse
+import cProfile
+import json
 import logging
 from datetime import datetime
 import os
 import pygame
 import numpy as np
+from sealgo import probes
 from game.game import Game
 
 def main():
@@ -12,6 +15,13 @@ def main():
     parser.add_argument("--level", type=int, default=1, help="Specify the starting level")
     parser.add_argument("--log-file", type=str, default="sokoban.log", help="Specify the log file")
     parser.add_argument("--icon-style", type=str, default="images_v1", help="Specify the icon style")
+    parser.add_argument("--portfolio", action="store_true", help="Solve levels by racing several search configurations in parallel")
+    parser.add_argument("--visualize", action="store_true", help="Draw samples of the states expanded by the AI in a second window")
+    parser.add_argument("--time-limit", type=float, default=None, help="Solve levels with anytime search under this budget (seconds), in the game and in test mode")
+    parser.add_argument("--job-timeout", type=float, default=None, help="Time limit of each level and configuration in test mode (seconds)")
+    parser.add_argument("--memory-limit", type=int, default=None, help="Memory limit of each level and configuration in test mode (MB)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of levels solved at once in test mode")
+    parser.add_argument("--profile", action="store_true", help="Write a report of the search probes and a cProfile dump of the run next to the log")
     args = parser.parse_args()
     
     if not os.path.exists('logs'):
@@ -22,12 +32,28 @@ def main():
                             logging.FileHandler(log_filename),
                             logging.StreamHandler()
                         ])
-    pygame.init()
-    game = Game(lvl_num=args.level, icon_style=args.icon_style)
-    if args.test:
-        game.test(b_weights=[1, 10, 100, 1000, np.inf])
-    else:
-        game.run()
+    if args.profile:
+        probes.enable()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        pygame.init()
+        game = Game(lvl_num=args.level, icon_style=args.icon_style, portfolio=args.portfolio, visualize=args.visualize,
+                    time_limit=args.time_limit)
+        if args.test:
+            memory_limit = None if args.memory_limit is None else args.memory_limit * 2**20
+            game.test(time_limit=args.time_limit, job_timeout=args.job_timeout, memory_limit=memory_limit, workers=args.workers)
+        else:
+            game.run()
+    finally:
+        if args.profile:
+            # the cProfile dump covers this process, the probes also the solver workers
+            profiler.disable()
+            base = os.path.splitext(log_filename)[0]
+            profiler.dump_stats(base + ".prof")
+            with open(base + "_probes.json", "w") as f:
+                json.dump(probes.report(), f, indent=4)
+            logging.info(f"Profile written to {base}.prof and {base}_probes.json")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
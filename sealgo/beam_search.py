@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from heapq import nsmallest
+from operator import itemgetter
+from typing import List, Tuple
+
+from .search import Search
+from .problem import HeuristicSearchProblem, Action, State
+
+class BeamSearch(Search):
+    """
+    Beam search with a bounded frontier.
+
+    Only the best `width` states of each depth are kept by heuristic value, and each depth only
+    remembers the parent index and action of its states, so memory use is O(width x depth).
+    Duplicates are detected within a bounded window of recently seen states. If the beam runs
+    dry, the search can be restarted with a wider beam. Like the best-first searches, the path
+    starts with the Action.STAY of the initial state.
+
+    Args:
+        problem (HeuristicSearchProblem): The heuristic search problem.
+        width (int, optional): The number of states kept per depth. Defaults to 100.
+        max_depth (int, optional): The maximum depth of the search. Defaults to 1000.
+        window (int, optional): The number of recently seen states remembered for duplicate detection. Defaults to 100_000.
+        widen (int, optional): The factor by which the beam is widened on restart, 1 for no restarts. Defaults to 1.
+        max_width (int, optional): The maximum width of a restarted beam. Defaults to 10_000.
+
+    Methods:
+        search(): Perform the beam search, restarting with a wider beam on failure.
+        _beam(width: int): Perform one beam search with the given width.
+    """
+    def __init__(self, problem: HeuristicSearchProblem, width: int = 100, max_depth: int = 1000,
+                 window: int = 100_000, widen: int = 1, max_width: int = 10_000) -> None:
+        super().__init__(problem)
+        self.width = width
+        self.max_depth = max_depth
+        self.window = window
+        self.widen = widen
+        self.max_width = max_width
+
+    def search(self) -> List[List[Action]]:
+        width = self.width
+        self.stats.start([self.problem])
+        try:
+            while True:
+                solution = self._beam(width)
+                if solution is not None:
+                    return [solution]
+                if self.widen <= 1 or width >= self.max_width:
+                    return []
+                width = min(width * self.widen, self.max_width)
+        finally:
+            self.stats.stop([self.problem])
+
+    def _beam(self, width: int) -> List[Action]|None:
+        """
+        Perform one beam search with the given width.
+
+        Args:
+            width (int): The number of states kept per depth.
+
+        Returns:
+            List[Action]|None: The solution if found, None otherwise.
+        """
+        init = self.problem.initial_state()
+        if self.problem.is_goal(init):
+            return [Action.STAY]
+        beam = [init]
+        seen = OrderedDict({self.problem.encode(init): None})
+        layers: List[List[Tuple[int, Action]]] = []
+        for _ in range(self.max_depth):
+            candidates = []
+            for i, state in enumerate(beam):
+                self.stats.expanded += 1
+                for action in self.problem.actions(state):
+                    child = self.problem.result(state, action)
+                    key = self.problem.encode(child)
+                    self.stats.generated += 1
+                    if key in seen:
+                        seen.move_to_end(key)
+                        self.stats.duplicates += 1
+                        continue
+                    seen[key] = None
+                    if len(seen) > self.window:
+                        seen.popitem(last=False)
+                    if self.problem.is_goal(child):
+                        layers.append([(i, action)])
+                        return self._reconstruct_path(layers)
+                    candidates.append((self._h(child), i, action, child))
+            if not candidates:
+                return None
+            self.stats.peak_frontier = max(self.stats.peak_frontier, len(candidates))
+            kept = nsmallest(width, candidates, key=itemgetter(0))
+            layers.append([(i, action) for _, i, action, _ in kept])
+            beam = [child for _, _, _, child in kept]
+        return None
+
+    def _h(self, state: State) -> float:
+        """Return the heuristic value of a state, counting the calls and their time in the stats."""
+        start_time = time.perf_counter()
+        h = self.problem.heuristic(state)
+        self.stats.heuristic_time += time.perf_counter() - start_time
+        self.stats.heuristic_calls += 1
+        return h
+
+    def _reconstruct_path(self, layers: List[List[Tuple[int, Action]]]) -> List[Action]:
+        actions = []
+        index = 0
+        for layer in reversed(layers):
+            index, action = layer[index]
+            actions.append(action)
+        actions.append(Action.STAY)
+        actions.reverse()
+        return actions
@@ -1,128 +1,527 @@
 from queue import PriorityQueue, Queue, LifoQueue
-from typing import List, Callable
+from typing import List, Callable, Generator, Tuple, Dict, Iterator, Hashable
+from math import inf
+import time
+import os
+
+import numpy as np
 
 from sealgo.problem import State
 
 from .search import Search
 from .problem import *
+from .node_store import NodeStore
+from .checkpoint import save_snapshot, load_snapshot
+from .observer import SampleChannel
+from . import probes
+from .memory import MemoryBudget, FRONTIER_ENTRY
 
-# TEST
-# from ui.display import Display
-# from game.map import Tile
-# assets_path = "assets"
-# icon_style = "images_v1"
-# icon_paths = {
-#         Tile.GOALBOX: os.path.join(assets_path, icon_style, "goalbox.png"),
-#         Tile.GOALPLAYER: os.path.join(assets_path, icon_style, "goalplayer.png"),
-#         Tile.BOX: os.path.join(assets_path, icon_style, "box.png"),
-#         Tile.GOAL: os.path.join(assets_path, icon_style, "goal.png"),
-#         Tile.WALL: os.path.join(assets_path, icon_style, "wall.png"),
-#         Tile.PLAYER: os.path.join(assets_path, icon_style, "player.png"),
-#         Tile.SPACE: os.path.join(assets_path, icon_style, "space.png"),
-#     }
-# d = Display(icon_paths)
 
 class BestFirstSearch(Search):
     def __init__(self, problem:SearchProblem) -> None:
         self.problem = problem
+        self.eval_f: Callable = lambda n, s: 0
+        # self.eval_f(node, state) must be defined in the subclass
+        self.checkpoint_path: str|None = None
+        self.checkpoint_every = 0
+        self.report_callback: Callable[[Dict[str, float]], None]|None = None
+        self.report_every = 0
+        self.observer: SampleChannel|None = None
+        self.memory_budget: MemoryBudget|None = None
+        self.status: str|None = None
+        probes.instrument(self, "_extend", "BestFirstSearch._extend")
+        self.reset()
+        
+    def reset(self, nodes: NodeStore|None = None) -> None:
+        """
+        Start the search over from the initial states.
+
+        An iterator of initial states is consumed at once, so that every root is stored with cost 0 and
+        duplicate roots are skipped before the first expansion.
+
+        Args:
+            nodes (NodeStore|None, optional): The store to keep the nodes in, a new NodeStore if None. Defaults to None.
+        """
         self.frontier = PriorityQueue()
+        self.nodes = NodeStore() if nodes is None else nodes # cost so far and predecessors
+        self._symmetric = False
         init = self.problem.initial_state()
-        if isinstance(init, list):
-            self.g_costs = {} # cost so far
-            self.predecessors = {}
-            for state in init:
-                self.g_costs[state] = 0
-                self.predecessors[state] = (None, Action.STAY)
-                self.frontier.put((-1, state))
-        else:
-            self.g_costs = {init: 0} # cost so far
-            self.predecessors = {init: (None, Action.STAY)}
-            self.frontier.put((-1, init))
-        self.eval_f: Callable = lambda s: 0
-        # self.eval_f must be defined in the subclass
+        for state in (init if isinstance(init, (list, Iterator)) else [init]):
+            key = self._key(state)
+            if key in self.nodes:
+                continue
+            node = self.nodes.add(key, NodeStore.ROOT, Action.STAY, 0)
+            self.frontier.put((-1, node))
+        self.expanded = 0
+        
+    def checkpoint(self, path: str, every: int = 100_000) -> None:
+        """
+        Save a snapshot of the search to a file periodically, resuming from it if it already exists.
+
+        The snapshot holds the frontier, the nodes and the counters as binary arrays,
+        so the problem must encode states as bytes (see SearchProblem.encode).
+
+        Args:
+            path (str): The path of the snapshot file.
+            every (int, optional): The number of expansions between snapshots. Defaults to 100_000.
+        """
+        self.checkpoint_path = path
+        self.checkpoint_every = every
+        if os.path.exists(path):
+            self._restore(load_snapshot(path))
+        
+    def report(self, callback: Callable[[Dict[str, float]], None], every: int = 1000) -> None:
+        """
+        Call a function with the progress of the search periodically (see _progress).
+
+        Args:
+            callback (Callable[[Dict[str, float]], None]): The function to call with the progress.
+            every (int, optional): The number of expansions between calls. Defaults to 1000.
+        """
+        self.report_callback = callback
+        self.report_every = every
+        
+    def observe(self, channel: SampleChannel) -> None:
+        """
+        Publish samples of the expanded states to a channel, for a renderer in another process.
+
+        Args:
+            channel (SampleChannel): The channel of the samples.
+        """
+        self.observer = channel
+        
+    def limit_memory(self, max_memory: int, every: int = 10_000, fallback: Callable[[SearchProblem], Search]|None = None) -> None:
+        """
+        Keep the search within a memory budget, degrading it when the budget is exceeded (see MemoryBudget).
+
+        Args:
+            max_memory (int): The budget in bytes.
+            every (int, optional): The number of expansions between samples of the memory. Defaults to 10_000.
+            fallback (Callable[[SearchProblem], Search]|None, optional): Builds the search run instead once the
+                nodes are dropped, or the search gives up with the status "memory_limit" if None. Defaults to None.
+        """
+        self.memory_budget = MemoryBudget(max_memory, every, fallback)
+        
+    def memory(self) -> Dict[str, int]:
+        """Return the approximate memory in bytes of the nodes, the frontier and the caches of the problem."""
+        return {"nodes": self.nodes.nbytes(), "frontier": FRONTIER_ENTRY * self.frontier.qsize(),
+                "caches": self.problem.cache_size()}
         
     def search(self) -> List[List[Action]]:
-        while not self.frontier.empty():
-            state = self.frontier.get()[1]
-            if self.problem.is_goal(state):
-                return [self._reconstruct_path(state)]
-            self._extend(state)
-        return []
+        self.stats.start([self.problem])
+        try:
+            while not self.frontier.empty():
+                node = self._pop()
+                state = self._state(node)
+                if self.observer is not None:
+                    self.observer.offer(self.nodes.keys[node])
+                if self.problem.is_goal(state):
+                    self.status = "solved"
+                    return [self._reconstruct_path(node)]
+                self._extend(node, state)
+                self.nodes.release(node)
+                self.expanded += 1
+                if self.checkpoint_path is not None and self.expanded % self.checkpoint_every == 0:
+                    save_snapshot(self.checkpoint_path, self._snapshot())
+                if self.report_callback is not None and self.expanded % self.report_every == 0:
+                    self.report_callback(self._progress())
+                if self.memory_budget is not None and self.expanded % self.memory_budget.every == 0:
+                    self._record_memory()
+                    if self.memory_budget.exceeded() and not self.memory_budget.relieve(self.problem):
+                        # drop the nodes before the fallback search builds its own
+                        self.nodes, self.frontier = NodeStore(), PriorityQueue()
+                        solutions = self.memory_budget.fall_back(self.problem)
+                        self.status = self.memory_budget.status
+                        return solutions
+            self.status = "failed"
+            return []
+        finally:
+            self._record_memory()
+            self.stats.expanded = self.expanded
+            self.stats.stop([self.problem])
+    
+    def _record_memory(self) -> None:
+        """Record the estimated memory of the search in the stats."""
+        self.stats.peak_memory_estimate = max(self.stats.peak_memory_estimate, sum(self.memory().values()))
+    
+    def _progress(self) -> Dict[str, float]:
+        """Return the number of expansions and nodes, the size of the frontier and the heuristic value of its best state."""
+        progress = {"expanded": self.expanded, "nodes": len(self.nodes), "frontier": self.frontier.qsize()}
+        if not self.frontier.empty() and hasattr(self.problem, "heuristic"):
+            progress["best_h"] = self.problem.heuristic(self._state(self.frontier.queue[0][1]))
+        return progress
+    
+    def _snapshot(self, nodes: bool = True) -> Dict[str, np.ndarray]:
+        """Return the frontier, counters and, unless nodes is False, nodes of the search as binary arrays."""
+        arrays = self.nodes.snapshot() if nodes else {}
+        arrays["frontier_f"] = np.array([f for f, _ in self.frontier.queue], dtype=np.float64)
+        arrays["frontier_nodes"] = np.array([node for _, node in self.frontier.queue], dtype=np.int64)
+        arrays["expanded"] = np.array(self.expanded, dtype=np.int64)
+        return arrays
     
-    def _extend(self, state: State) -> None:
-        # d.render(state)
+    def _restore(self, arrays: Dict[str, np.ndarray], nodes: NodeStore|None = None) -> None:
+        """Restore the search from the arrays returned by _snapshot, or from those and a restored store."""
+        self.nodes = NodeStore.restore(arrays) if nodes is None else nodes
+        self.frontier = PriorityQueue()
+        # the entries were saved in heap order
+        self.frontier.queue = list(zip(arrays["frontier_f"].tolist(), arrays["frontier_nodes"].tolist()))
+        self.expanded = int(arrays["expanded"])
+        self._symmetric = True # the saved keys may be canonical
+    
+    def _pop(self) -> int:
+        """Remove and return the next node to expand from the frontier."""
+        return self.frontier.get()[1]
+    
+    def _state(self, node: int) -> State:
+        """Return the state of a node."""
+        return self.problem.decode(self.nodes.keys[node])
+    
+    def _extend(self, node: int, state: State) -> None:
         for action in self.problem.actions(state):
             next_state = self.problem.result(state, action)
-            # d.render(next_state)
-            g_cost = self.g_costs[state] + self.problem.action_cost(state, action)
-            if next_state not in self.g_costs or g_cost < self.g_costs[next_state]:
-                self.predecessors[next_state] = (state, action)
-                self.g_costs[next_state] = g_cost
-                eval = self.eval_f(next_state)
-                self.frontier.put((eval, next_state))
-    
-    def _reconstruct_path(self, state: State) -> List[Action]:
-        actions = []
-        while state:
-            state, action = self.predecessors[state]
+            g_cost = self.nodes.g[node] + self.problem.action_cost(state, action)
+            next_node = self._relax(node, next_state, action, g_cost)
+            self.stats.generated += 1
+            if next_node is not None:
+                self.frontier.put((self.eval_f(next_node, next_state), next_node))
+            else:
+                self.stats.duplicates += 1
+        self.stats.peak_frontier = max(self.stats.peak_frontier, len(self.frontier.queue))
+    
+    def _h(self, state: State) -> float:
+        """Return the heuristic value of a state, counting the calls and their time in the stats."""
+        start_time = time.perf_counter()
+        h = self.problem.heuristic(state)
+        self.stats.heuristic_time += time.perf_counter() - start_time
+        self.stats.heuristic_calls += 1
+        return h
+                
+    def _relax(self, node: int, next_state: State, action: Action, g_cost: int|float) -> int|None:
+        """
+        Record a path to a state if it is new or cheaper than the known one.
+
+        Returns:
+            int|None: The id of the state's node if the path was recorded, None otherwise.
+        """
+        return self.nodes.relax(self._key(next_state), node, action, g_cost)
+    
+    def _key(self, state: State) -> Hashable:
+        """Return the key of a state, canonical under the symmetries of the problem (see SearchProblem.canonical)."""
+        key = self.problem.encode(state)
+        canonical = self.problem.canonical(key)
+        if canonical != key:
+            self._symmetric = True
+        return canonical
+    
+    def _reconstruct_path(self, node: int) -> List[Action]:
+        if not self._symmetric or self.nodes.replays:
+            return self.nodes.path(node)
+        # the actions were taken from the representatives, so replay the path from the initial state
+        keys = []
+        while node != NodeStore.ROOT:
+            keys.append(self.nodes.keys[node])
+            root = node
+            node = self.nodes.parents[node]
+        keys.reverse()
+        init = self.problem.initial_state()
+        state = next(state for state in (init if isinstance(init, (list, Iterator)) else [init]) if self._key(state) == keys[0])
+        actions = [self.nodes.action(root)]
+        for key in keys[1:]:
+            for action in self.problem.actions(state):
+                next_state = self.problem.result(state, action)
+                if self._key(next_state) == key:
+                    break
+            else:
+                raise RuntimeError("No action leads to the next state of the path, the canonical form of the problem is not a symmetry.")
             actions.append(action)
-        actions.reverse()
+            state = next_state
         return actions
 
 class BFS(BestFirstSearch):
     def __init__(self, problem:SearchProblem):
-        self.problem = problem
+        super().__init__(problem)
+        
+    def reset(self, nodes: NodeStore|None = None) -> None:
         self.frontier = Queue()
-        self.predecessors = {self.problem.initial_state(): (None, Action.STAY)}
-        self.frontier.put(self.problem.initial_state())
+        self.nodes = NodeStore() if nodes is None else nodes
+        self._symmetric = False
+        init = self.problem.initial_state()
+        self.frontier.put(self.nodes.add(self._key(init), NodeStore.ROOT, Action.STAY, 0))
+        self.expanded = 0
         
     def search(self) -> List[List[Action]]:
-        while not self.frontier.empty():
-            state = self.frontier.get()
-            if self.problem.is_goal(state):
-                return [self._reconstruct_path(state)]
-            self._extend(state)
-        return []
+        self.stats.start([self.problem])
+        try:
+            while not self.frontier.empty():
+                node = self.frontier.get()
+                state = self._state(node)
+                if self.problem.is_goal(state):
+                    return [self._reconstruct_path(node)]
+                self._extend(node, state)
+                self.nodes.release(node)
+                self.expanded += 1
+            return []
+        finally:
+            self.stats.expanded = self.expanded
+            self.stats.stop([self.problem])
     
-    def _extend(self, state: State) -> None:
+    def _extend(self, node: int, state: State) -> None:
         for action in self.problem.actions(state):
-            next_state = self.problem.result(state, action)
-            if next_state not in self.predecessors:
-                self.predecessors[next_state] = (state, action)
-                self.frontier.put(next_state)
+            key = self._key(self.problem.result(state, action))
+            self.stats.generated += 1
+            if key not in self.nodes:
+                self.frontier.put(self.nodes.add(key, node, action, self.nodes.g[node] + 1))
+            else:
+                self.stats.duplicates += 1
+        self.stats.peak_frontier = max(self.stats.peak_frontier, self.frontier.qsize())
     
 class DFS(BestFirstSearch):
     def __init__(self, problem:SearchProblem, max_depth = 100):
-        self.problem = problem
-        self.frontier = LifoQueue()
-        self.predecessors = {self.problem.initial_state(): (None, Action.STAY)}
-        self.frontier.put(self.problem.initial_state())
         self.max_depth = max_depth
+        super().__init__(problem)
+        
+    def reset(self, nodes: NodeStore|None = None) -> None:
+        self.frontier = LifoQueue()
+        self.nodes = NodeStore() if nodes is None else nodes
+        self._symmetric = False
+        init = self.problem.initial_state()
+        self.frontier.put(self.nodes.add(self._key(init), NodeStore.ROOT, Action.STAY, 0))
+        self.expanded = 0
         
     def search(self) -> List[List[Action]]:
-        while not self.frontier.empty():
-            state = self.frontier.get()
-            if self.problem.is_goal(state):
-                return [self._reconstruct_path(state)]
-            if len(self._reconstruct_path(state)) < self.max_depth:
-                for action in self.problem.actions(state):
-                    next_state = self.problem.result(state, action)
-                    if next_state not in self.predecessors:
-                        self.predecessors[next_state] = (state, action)
-                        self.frontier.put(next_state)
-        return []
+        self.stats.start([self.problem])
+        try:
+            while not self.frontier.empty():
+                node = self.frontier.get()
+                state = self._state(node)
+                if self.problem.is_goal(state):
+                    return [self._reconstruct_path(node)]
+                self.expanded += 1
+                if self.nodes.g[node] + 1 < self.max_depth:
+                    for action in self.problem.actions(state):
+                        key = self._key(self.problem.result(state, action))
+                        self.stats.generated += 1
+                        if key not in self.nodes:
+                            self.frontier.put(self.nodes.add(key, node, action, self.nodes.g[node] + 1))
+                        else:
+                            self.stats.duplicates += 1
+                    self.stats.peak_frontier = max(self.stats.peak_frontier, self.frontier.qsize())
+            return []
+        finally:
+            self.stats.expanded = self.expanded
+            self.stats.stop([self.problem])
         
 class Dijkstra(BestFirstSearch):
     def __init__(self, problem:SearchProblem):
         super().__init__(problem)
-        self.eval_f = lambda s: self.g_costs[s]
+        self.eval_f = lambda n, s: self.nodes.g[n]
         
 class GBFS(BestFirstSearch):
     def __init__(self, problem:HeuristicSearchProblem):
         super().__init__(problem)
-        self.eval_f = lambda s: self.problem.heuristic(s)
+        self.eval_f = lambda n, s: self._h(s)
         
 class AStar(BestFirstSearch):
     def __init__(self, problem:HeuristicSearchProblem, weight:float|int=1):
         super().__init__(problem)
-        self.eval_f = lambda s: self.g_costs[s] + weight * self.problem.heuristic(s)
\ No newline at end of file
+        self.weight = weight
+        self.eval_f = lambda n, s: self.nodes.g[n] + weight * self._h(s)
+        
+class LazyAStar(AStar):
+    """
+    A* with lazy heuristic evaluation.
+
+    Children are queued with the heuristic value of their parent less the cost of the action,
+    which is a lower bound of their own value when the heuristic is consistent, and the heuristic
+    of a state is only evaluated when it reaches the front of the frontier. If the exact value
+    makes the state worse, it is re-queued with its exact evaluation.
+
+    Args:
+        problem (HeuristicSearchProblem): The heuristic search problem.
+        weight (float|int, optional): The weight of the heuristic. Defaults to 1.
+
+    Attributes:
+        h_values (dict): The exact heuristic values of the evaluated nodes.
+    """
+    def __init__(self, problem:HeuristicSearchProblem, weight:float|int=1):
+        super().__init__(problem, weight)
+        self.weight = weight
+        self.eval_f = lambda n, s: self.nodes.g[n] + weight * self.h_values.get(n, self._bound(n))
+        
+    def reset(self, nodes: NodeStore|None = None) -> None:
+        super().reset(nodes)
+        self.h_values = {}
+        self._parent_h = 0
+        self._parent_g = 0
+        self._decoded = (None, None)
+        
+    def _snapshot(self, nodes: bool = True) -> Dict[str, np.ndarray]:
+        arrays = super()._snapshot(nodes)
+        arrays["h_nodes"] = np.fromiter(self.h_values.keys(), dtype=np.int64, count=len(self.h_values))
+        arrays["h_values"] = np.fromiter(self.h_values.values(), dtype=np.float64, count=len(self.h_values))
+        return arrays
+    
+    def _restore(self, arrays: Dict[str, np.ndarray], nodes: NodeStore|None = None) -> None:
+        super()._restore(arrays, nodes)
+        self.h_values = dict(zip(arrays["h_nodes"].tolist(), arrays["h_values"].tolist()))
+        
+    def _pop(self) -> int:
+        while True:
+            f, node = self.frontier.get()
+            if node in self.h_values:
+                return node
+            self.h_values[node] = self._h(self._state(node))
+            exact = self.nodes.g[node] + self.weight * self.h_values[node]
+            if exact <= f:
+                return node
+            self.frontier.put((exact, node))
+            
+    def _state(self, node: int) -> State:
+        # the state evaluated in _pop is usually expanded right after
+        if self._decoded[0] != node:
+            self._decoded = (node, super()._state(node))
+        return self._decoded[1]
+            
+    def _bound(self, node: int) -> float:
+        """Return the lower bound of the heuristic value of a child of the node being expanded."""
+        return max(0, self._parent_h - (self.nodes.g[node] - self._parent_g))
+
+    def _extend(self, node: int, state: State) -> None:
+        self._parent_h = self.h_values[node]
+        self._parent_g = self.nodes.g[node]
+        super()._extend(node, state)
+        
+class ARAStar(BestFirstSearch):
+    """
+    Anytime Repairing A* (ARA*).
+
+    Finds a first solution quickly with a high heuristic weight, then lowers the weight
+    and repairs the previous search, reusing its g-costs and open/closed lists, to emit
+    better solutions until the final weight or the deadline is reached.
+
+    Args:
+        problem (HeuristicSearchProblem): The heuristic search problem.
+        weight (float|int, optional): The initial weight of the heuristic. Defaults to 3.
+        final_weight (float|int, optional): The weight at which to stop improving. Defaults to 1.
+        step (float|int, optional): The decrease of the weight after each solution. Defaults to 0.5.
+        time_limit (float|None, optional): The time budget in seconds, None for no limit. Defaults to None.
+
+    Attributes:
+        weight (float|int): The current weight of the heuristic.
+        closed (set): The nodes expanded under the current weight.
+        incons (set): The closed nodes whose g-cost improved under the current weight.
+        goal (int|None): The node of the best goal state found so far.
+        goal_cost (float|int): The g-cost of the best goal state found so far.
+    """
+    def __init__(self, problem:HeuristicSearchProblem, weight:float|int=3, final_weight:float|int=1,
+                 step:float|int=0.5, time_limit:float|None=None):
+        super().__init__(problem)
+        self.weight = weight
+        self.final_weight = final_weight
+        self.step = step
+        self.time_limit = time_limit
+        self.eval_f = lambda n, s: self.nodes.g[n] + self.weight * self._h(s)
+        
+    def reset(self, nodes: NodeStore|None = None) -> None:
+        super().reset(nodes)
+        self.closed = set()
+        self.incons = set()
+        self.goal = None
+        self.goal_cost = inf
+        
+    def solutions(self) -> Generator[Tuple[List[Action], float], None, None]:
+        """
+        Generate improving solutions until the final weight or the deadline is reached.
+
+        Yields:
+            Tuple[List[Action], float]: A solution and the bound on its suboptimality.
+        """
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+        last_cost = inf
+        self.stats.start([self.problem])
+        try:
+            while True:
+                timeout = not self._improve_path(deadline)
+                if self.goal is not None and self.goal_cost < last_cost:
+                    last_cost = self.goal_cost
+                    yield self._reconstruct_path(self.goal), self._bound()
+                if timeout or self.weight <= self.final_weight or self.frontier.empty():
+                    return
+                self.weight = max(self.final_weight, self.weight - self.step)
+                self._rebuild_frontier()
+        finally:
+            self.stats.expanded = self.expanded
+            self.stats.stop([self.problem])
+            
+    def search(self) -> List[List[Action]]:
+        best = None
+        for solution, _ in self.solutions():
+            best = solution
+        return [best] if best is not None else []
+    
+    def _improve_path(self, deadline: float|None) -> bool:
+        """
+        Expand states until no state in the frontier can improve the current solution.
+
+        Args:
+            deadline (float|None): The time at which to give up, None for no limit.
+
+        Returns:
+            bool: False if the deadline was reached, True otherwise.
+        """
+        while not self.frontier.empty():
+            if deadline is not None and time.time() > deadline:
+                return False
+            f, node = self.frontier.queue[0]
+            if self.goal_cost <= f:
+                return True
+            self.frontier.get()
+            if node in self.closed:
+                continue
+            self.closed.add(node)
+            state = self._state(node)
+            if self.problem.is_goal(state):
+                if self.nodes.g[node] < self.goal_cost:
+                    self.goal, self.goal_cost = node, self.nodes.g[node]
+                continue
+            self._extend(node, state)
+            self.expanded += 1
+        return True
+    
+    def _extend(self, node: int, state: State) -> None:
+        for action in self.problem.actions(state):
+            next_state = self.problem.result(state, action)
+            g_cost = self.nodes.g[node] + self.problem.action_cost(state, action)
+            next_node = self._relax(node, next_state, action, g_cost)
+            self.stats.generated += 1
+            if next_node is None:
+                self.stats.duplicates += 1
+                continue
+            if next_node in self.closed:
+                self.incons.add(next_node)
+            else:
+                self.frontier.put((self.eval_f(next_node, next_state), next_node))
+        self.stats.peak_frontier = max(self.stats.peak_frontier, len(self.frontier.queue))
+    
+    def _open(self) -> set:
+        """Return the nodes in the frontier and the inconsistent nodes."""
+        return {node for _, node in self.frontier.queue if node not in self.closed} | self.incons
+    
+    def _rebuild_frontier(self) -> None:
+        """Move the inconsistent nodes into the frontier and re-key it under the current weight."""
+        nodes = self._open()
+        self.frontier = PriorityQueue()
+        for node in nodes:
+            self.frontier.put((self.eval_f(node, self._state(node)), node))
+        self.closed = set()
+        self.incons = set()
+        
+    def _bound(self) -> float:
+        """Return the bound on the suboptimality of the current solution."""
+        nodes = self._open()
+        if not nodes:
+            return 1
+        min_f = min(self.nodes.g[n] + self.problem.heuristic(self._state(n)) for n in nodes)
+        if min_f <= 0:
+            return self.weight
+        return max(1, min(self.weight, self.goal_cost / min_f))
@@ -1,53 +1,64 @@
-from typing import List, Type
+from typing import List, Type, Hashable, Dict, Callable
 from queue import PriorityQueue
 from copy import copy
+from math import inf
 import os
 
+import numpy as np
+
 from .problem import SearchProblem, HeuristicSearchProblem, BiSearchProblem, Action, State
 from .search import Search
-from .best_first_search import BestFirstSearch, AStar
-
-# TEST
-# from ui.display import Display
-# from game.map import Tile
-# assets_path = "assets"
-# icon_style = "images_v1"
-# icon_paths = {
-#         Tile.GOALBOX: os.path.join(assets_path, icon_style, "goalbox.png"),
-#         Tile.GOALPLAYER: os.path.join(assets_path, icon_style, "goalplayer.png"),
-#         Tile.BOX: os.path.join(assets_path, icon_style, "box.png"),
-#         Tile.GOAL: os.path.join(assets_path, icon_style, "goal.png"),
-#         Tile.WALL: os.path.join(assets_path, icon_style, "wall.png"),
-#         Tile.PLAYER: os.path.join(assets_path, icon_style, "player.png"),
-#         Tile.SPACE: os.path.join(assets_path, icon_style, "space.png"),
-#     }
-# d = Display(icon_paths)
+from .best_first_search import BestFirstSearch, AStar, Dijkstra
+from .node_store import NodeStore, BiNodeStore
+from .checkpoint import save_snapshot, load_snapshot
+from .observer import SampleChannel
+from .stats import SearchStats
+from . import probes
+from .memory import MemoryBudget, FRONTIER_ENTRY
+
 
 class BiDirectional(Search):
     """
     BiDirectional class represents a bidirectional search algorithm.
 
+    Both searches record where they meet, and the cheapest meeting is kept. If both searches are
+    Dijkstra or A* at weight 1 with admissible heuristics, the search goes on until no path through
+    the frontiers can be cheaper than that meeting, and the path returned is optimal. Otherwise the
+    priorities of the frontiers bound nothing, and the first meeting is returned.
+
     Args:
         problem (BiSearchProblem): The bidirectional search problem.
         f_algo (Type[BestFirstSearch]): The forward search algorithm.
         b_algo (Type[BestFirstSearch]|None, optional): The backward search algorithm. Defaults to None.
-        b_weight (int, optional): The the proportion of backwards to forwards, at least 1. Defaults to 1.
+        b_weight (int|None, optional): The the proportion of backwards to forwards, at least 1.
+            If None, each step expands the side with the smaller frontier. Defaults to None.
         *args: Additional arguments to be passed to the search algorithms.
         **kwargs: Additional keyword arguments to be passed to the search algorithms.
 
     Attributes:
         f_algo (BestFirstSearch): The forward search algorithm.
         b_algo (BestFirstSearch): The backward search algorithm.
-        b_weight (int): The weight of the backward search.
+        b_weight (int|None): The weight of the backward search, None for adaptive scheduling.
+        nodes (BiNodeStore): The node store shared by both searches, which records where they meet.
+        bounded (bool): Whether the frontiers bound the cost of the paths left, so that the search stops on that bound.
+        stats (SearchStats): The statistics of both searches.
+        status (str|None): "solved", "failed", "memory_limit" or "fallback" after a search, None before.
 
     Methods:
         search(): Perform the bidirectional search and return the path from the initial state to the goal state.
+        checkpoint(path: str, every: int): Save snapshots of both searches periodically, resuming from an existing one.
+        report(callback: Callable, every: int): Call a function with the progress of both searches periodically.
+        observe(channel: SampleChannel): Publish samples of the expanded states to a channel.
+        limit_memory(max_memory: int, every: int, fallback: Callable): Keep both searches within a memory budget.
+        memory(): Return the approximate memory of the nodes, the frontiers and the caches of the problem.
         _init_problem(problem: BiSearchProblem): Initialize the forward and backward search problems.
-        _reconstruct_path(inter_state: State): Reconstruct the path from the initial state to the goal state.
+        _reconstruct_path(inter_key: Hashable): Reconstruct the path from the initial state to the goal state.
+        _path_to_goal(key: Hashable): Follow the backward search from a state it reached to a goal.
 
     """
 
-    def __init__(self, problem: BiSearchProblem, f_algo: Type[BestFirstSearch], b_algo: Type[BestFirstSearch]|None = None, b_weight: int = 1, *args, **kwargs) -> None:
+    def __init__(self, problem: BiSearchProblem, f_algo: Type[BestFirstSearch], b_algo: Type[BestFirstSearch]|None = None, b_weight: int|None = None, *args, **kwargs) -> None:
+        self.problem = problem
         self._init_problem(problem)
         if b_algo is None:
             b_algo = f_algo
@@ -58,6 +69,76 @@ class BiDirectional(Search):
             self.f_algo = f_algo(self.f_problem)
             self.b_algo = b_algo(self.b_problem)
         self.b_weight = b_weight
+        self.bounded = self._admissible(self.f_algo) and self._admissible(self.b_algo)
+        self.b_times = 0
+        self.nodes = BiNodeStore()
+        self.f_algo.reset(self.nodes.view(BiNodeStore.FORWARD))
+        self.b_algo.reset(self.nodes.view(BiNodeStore.BACKWARD))
+        self.checkpoint_path: str|None = None
+        self.checkpoint_every = 0
+        self.report_callback: Callable[[Dict[str, float]], None]|None = None
+        self.report_every = 0
+        self.observer: SampleChannel|None = None
+        self._timing = SearchStats()
+        self.memory_budget: MemoryBudget|None = None
+        self.status: str|None = None
+        probes.instrument(self, "search", "BiDirectional.search")
+        
+    def checkpoint(self, path: str, every: int = 100_000) -> None:
+        """
+        Save a snapshot of both searches to a file periodically, resuming from it if it already exists.
+
+        Args:
+            path (str): The path of the snapshot file.
+            every (int, optional): The number of expansions between snapshots. Defaults to 100_000.
+        """
+        self.checkpoint_path = path
+        self.checkpoint_every = every
+        if os.path.exists(path):
+            arrays = load_snapshot(path)
+            self.nodes = BiNodeStore.restore(arrays)
+            self.f_algo._restore({name[8:]: array for name, array in arrays.items() if name.startswith("forward_")},
+                                 self.nodes.view(BiNodeStore.FORWARD))
+            self.b_algo._restore({name[9:]: array for name, array in arrays.items() if name.startswith("backward_")},
+                                 self.nodes.view(BiNodeStore.BACKWARD))
+            self.b_times = int(arrays["b_times"])
+        
+    def report(self, callback: Callable[[Dict[str, float]], None], every: int = 1000) -> None:
+        """
+        Call a function with the progress of both searches periodically (see _progress).
+
+        Args:
+            callback (Callable[[Dict[str, float]], None]): The function to call with the progress.
+            every (int, optional): The number of expansions between calls. Defaults to 1000.
+        """
+        self.report_callback = callback
+        self.report_every = every
+        
+    def observe(self, channel: SampleChannel) -> None:
+        """
+        Publish samples of the states expanded by both searches to a channel, for a renderer in another process.
+
+        Args:
+            channel (SampleChannel): The channel of the samples.
+        """
+        self.observer = channel
+        
+    def limit_memory(self, max_memory: int, every: int = 10_000, fallback: Callable[[SearchProblem], Search]|None = None) -> None:
+        """
+        Keep both searches within a memory budget, degrading them when the budget is exceeded (see MemoryBudget).
+
+        Args:
+            max_memory (int): The budget in bytes.
+            every (int, optional): The number of expansions between samples of the memory. Defaults to 10_000.
+            fallback (Callable[[SearchProblem], Search]|None, optional): Builds the search run on the problem once the
+                nodes are dropped, or the search gives up with the status "memory_limit" if None. Defaults to None.
+        """
+        self.memory_budget = MemoryBudget(max_memory, every, fallback)
+        
+    def memory(self) -> Dict[str, int]:
+        """Return the approximate memory in bytes of the shared nodes, both frontiers and the caches of the problem."""
+        frontier = self.f_algo.frontier.qsize() + self.b_algo.frontier.qsize()
+        return {"nodes": self.nodes.nbytes(), "frontier": FRONTIER_ENTRY * frontier, "caches": self.problem.cache_size()}
         
     def search(self) -> List[List[Action]]:
         """
@@ -67,20 +148,115 @@ class BiDirectional(Search):
             List[List[Action]]: The path from the initial state to the goal state.
 
         """
-        b_times = 0
-        while not self.f_algo.frontier.empty() and not self.b_algo.frontier.empty():
-            if b_times >= self.b_weight:
-                b_times = 0
-                # forward search
-                f_state = self.f_algo.frontier.get()[1]
-                self.f_algo._extend(f_state)
-            # backward search
-            b_state = self.b_algo.frontier.get()[1]
-            if b_state in self.f_algo.predecessors:
-                return [self._reconstruct_path(b_state)]
-            self.b_algo._extend(b_state)
-            b_times += 1
-        return []
+        # the heuristics of both searches are those of the problem, which holds the counters
+        self._timing.start([self.problem])
+        try:
+            while not self.f_algo.frontier.empty() and not self.b_algo.frontier.empty():
+                if self.bounded:
+                    # no path through the frontiers can be cheaper than the best meeting
+                    if self.nodes.best_cost <= max(self._min_f(self.f_algo), self._min_f(self.b_algo)):
+                        break
+                elif self.nodes.best_key is not None:
+                    break
+                if self._forward_turn():
+                    self.b_times = 0
+                    self._expand(self.f_algo)
+                else:
+                    self._expand(self.b_algo)
+                    self.b_times += 1
+                expanded = self.f_algo.expanded + self.b_algo.expanded
+                if self.checkpoint_path is not None and expanded % self.checkpoint_every == 0:
+                    save_snapshot(self.checkpoint_path, self._snapshot())
+                if self.report_callback is not None and expanded % self.report_every == 0:
+                    self.report_callback(self._progress())
+                if self.memory_budget is not None and expanded % self.memory_budget.every == 0:
+                    self._record_memory()
+                    if self.memory_budget.exceeded() and not self.memory_budget.relieve(self.problem):
+                        return self._fall_back()
+        finally:
+            self._record_memory()
+            self._timing.stop([self.problem])
+        if self.nodes.best_key is None:
+            self.status = "failed"
+            return []
+        self.status = "solved"
+        return [self._reconstruct_path(self.nodes.best_key)]
+
+    def _record_memory(self) -> None:
+        """Record the estimated memory of both searches in the stats."""
+        self._timing.peak_memory_estimate = max(self._timing.peak_memory_estimate, sum(self.memory().values()))
+
+    def _fall_back(self) -> List[List[Action]]:
+        """Drop the nodes of both searches and run the fallback search of the memory budget, if any."""
+        self._record_memory()
+        self.nodes = BiNodeStore()
+        for algo in (self.f_algo, self.b_algo):
+            algo.nodes, algo.frontier = NodeStore(), PriorityQueue()
+        solutions = self.memory_budget.fall_back(self.problem)
+        self.status = self.memory_budget.status
+        return solutions
+
+    @property
+    def stats(self) -> SearchStats:
+        """The statistics of both searches, with the time and problem counters of the whole search and the larger peak frontier."""
+        stats = SearchStats.aggregate([self._timing, self.f_algo.stats, self.b_algo.stats])
+        stats.expanded = self.f_algo.expanded + self.b_algo.expanded
+        return stats
+
+    def _forward_turn(self) -> bool:
+        """Return whether the next expansion is forward, by the fixed proportion or the smaller frontier."""
+        if self.b_weight is None:
+            return self.f_algo.frontier.qsize() < self.b_algo.frontier.qsize()
+        return self.b_times >= self.b_weight
+
+    def _expand(self, algo: BestFirstSearch) -> None:
+        """
+        Expand the best node of one search, recording a meeting if it is a goal reached forward.
+
+        Meetings of the two searches are recorded by the shared store as nodes are added.
+
+        Args:
+            algo (BestFirstSearch): The search to expand.
+        """
+        node = algo._pop()
+        key = algo.nodes.keys[node]
+        state = algo._state(node)
+        if self.observer is not None:
+            self.observer.offer(key)
+        if algo is self.f_algo and self.f_problem.is_goal(state):
+            # the forward search reached a goal the backward search did not start from
+            self.nodes.meet(key, algo.nodes.g[node])
+        algo._extend(node, state)
+        algo.expanded += 1
+
+    def _progress(self) -> Dict[str, float]:
+        """Return the progress of the forward search, with the totals of both searches and the cost of the best meeting."""
+        progress = self.f_algo._progress()
+        progress.update({
+            "expanded": self.f_algo.expanded + self.b_algo.expanded,
+            "nodes": len(self.nodes),
+            "frontier": self.f_algo.frontier.qsize() + self.b_algo.frontier.qsize(),
+            "best_cost": self.nodes.best_cost,
+        })
+        return progress
+
+    @staticmethod
+    def _admissible(algo: BestFirstSearch) -> bool:
+        """Return whether the priorities of a search are lower bounds, given an admissible heuristic."""
+        return isinstance(algo, Dijkstra) or (isinstance(algo, AStar) and algo.weight == 1)
+
+    @staticmethod
+    def _min_f(algo: BestFirstSearch) -> float:
+        """Return the lowest priority in the frontier of a search, a lower bound of its unexpanded paths."""
+        return algo.frontier.queue[0][0]
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        """Return the frontiers, nodes and counters of both searches as binary arrays."""
+        arrays = self.nodes.snapshot()
+        arrays["b_times"] = np.array(self.b_times, dtype=np.float64)
+        arrays.update({"forward_" + name: array for name, array in self.f_algo._snapshot(nodes=False).items()})
+        arrays.update({"backward_" + name: array for name, array in self.b_algo._snapshot(nodes=False).items()})
+        return arrays
 
     def _init_problem(self, problem: BiSearchProblem) -> None:
         """
@@ -102,6 +278,8 @@ class BiDirectional(Search):
         b_problem.result = problem.reason
         f_problem.action_cost = problem.action_cost
         b_problem.action_cost = problem.action_cost
+        # the two searches can only meet on exact keys
+        f_problem.canonical = b_problem.canonical = lambda key: key
         if hasattr(problem, "heuristic"):
             f_problem.heuristic = problem.heuristic
         if hasattr(problem, "re_heuristic"):
@@ -109,30 +287,45 @@ class BiDirectional(Search):
         self.f_problem = f_problem
         self.b_problem = b_problem
     
-    def _reconstruct_path(self, inter_state: State) -> List[Action]:
+    def _reconstruct_path(self, inter_key: Hashable) -> List[Action]:
         """
         Reconstruct the path from the initial state to the goal state.
 
         Args:
-            inter_state (State): The intermediate state where the forward and backward paths meet.
+            inter_key (Hashable): The key of the intermediate state where the forward and backward paths meet,
+                or of a goal state reached by the forward search.
 
         Returns:
             List[Action]: The path from the initial state to the goal state.
 
         """
+        f_nodes = self.f_algo.nodes
         f_solution = []
-        f_state = inter_state
-        while self.f_algo.predecessors[f_state][0] is not None:
-            # d.render(f_state)
-            f_solution.append(self.f_algo.predecessors[f_state][1])
-            f_state = self.f_algo.predecessors[f_state][0]
+        f_node = f_nodes.get(inter_key)
+        while f_nodes.parents[f_node] != NodeStore.ROOT:
+            f_solution.append(f_nodes.action(f_node))
+            f_node = f_nodes.parents[f_node]
         f_solution.reverse()
-        
+        return f_solution + self._path_to_goal(inter_key)
+
+    def _path_to_goal(self, key: Hashable) -> List[Action]:
+        """
+        Follow the backward search from a state it reached to a goal.
+
+        Args:
+            key (Hashable): The key of a state in the backward search.
+
+        Returns:
+            List[Action]: The path from the state to a goal state, empty if the state is not in the backward search.
+        """
+        b_nodes = self.b_algo.nodes
         b_solution = []
-        b_state = inter_state
-        while self.b_algo.predecessors[b_state][0] is not None:
-            # d.render(b_state)
-            b_solution.append(self.b_algo.predecessors[b_state][1][0])
-            b_state = self.b_algo.predecessors[b_state][0]
-        
-        return f_solution + b_solution
\ No newline at end of file
+        b_node = b_nodes.get(key)
+        # the backward roots are representatives of the goals, so stop at the first goal on the way
+        state = self.f_problem.decode(key)
+        while b_node is not None and b_nodes.parents[b_node] != NodeStore.ROOT and not self.f_problem.is_goal(state):
+            action = b_nodes.action(b_node)[0]
+            b_solution.append(action)
+            state = self.f_problem.result(state, action)
+            b_node = b_nodes.parents[b_node]
+        return b_solution
@@ -0,0 +1,189 @@
+from copy import copy
+from hashlib import blake2b
+from math import exp
+from typing import Dict, Hashable, Iterator, List
+
+from .problem import SearchProblem, Action, State
+from .node_store import NodeStore
+from .best_first_search import BFS
+
+class BloomFilter:
+    """
+    A Bloom filter over state keys.
+
+    Membership tests never give false negatives, but may give false positives with a rate
+    that grows with the number of added keys relative to the size of the filter.
+
+    Args:
+        bits (int, optional): The size of the filter in bits. Defaults to 2**27 (16 MiB).
+        hashes (int, optional): The number of hash functions. Defaults to 3.
+
+    Methods:
+        add(key): Add a key to the filter.
+        false_positive_rate() -> float: Return the estimated false positive rate of membership tests.
+    """
+    def __init__(self, bits: int = 2**27, hashes: int = 3) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.count = 0
+        self._table = bytearray((bits + 7) // 8)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(self._table[i >> 3] & (1 << (i & 7)) for i in self._indices(key))
+
+    def add(self, key: Hashable) -> None:
+        for i in self._indices(key):
+            self._table[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def false_positive_rate(self) -> float:
+        """Return the estimated probability that a key never added is reported as present."""
+        return (1 - exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def _indices(self, key: Hashable) -> List[int]:
+        if not isinstance(key, bytes):
+            key = hash(key).to_bytes(8, "little", signed=True)
+        digest = blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+class BitstateStore(NodeStore):
+    """
+    Approximate node store with a probabilistic closed set, for searches that exceed memory.
+
+    Every discovered key is added to a Bloom filter, and exact records are only kept for the
+    nodes in the frontier. Every `anchor_interval` steps along a path, a node is kept as an
+    anchor with a link to its previous anchor. Solutions are reconstructed by re-searching
+    the short segments between consecutive anchors.
+
+    Since a false positive prunes a state that was never visited, the search may miss
+    solutions with a probability bounded by the false positive rate of the filter.
+
+    The segments are re-searched from the actual states along the path, so the path is also
+    found when the keys are canonical under the symmetries of the problem.
+
+    Args:
+        problem (SearchProblem): The search problem, used to re-search the path segments.
+        bits (int, optional): The size of the Bloom filter in bits. Defaults to 2**27.
+        hashes (int, optional): The number of hash functions of the filter. Defaults to 3.
+        anchor_interval (int, optional): The number of steps between anchors. Defaults to 16.
+
+    Usage:
+        search = AStar(problem, weight=3)
+        search.reset(BitstateStore(problem, bits=2**30))
+        search.search()
+    """
+    replays = True
+
+    def __init__(self, problem: SearchProblem, bits: int = 2**27, hashes: int = 3, anchor_interval: int = 16) -> None:
+        self.problem = problem
+        self.closed = BloomFilter(bits, hashes)
+        self.anchor_interval = anchor_interval
+        self.anchors = NodeStore()
+        self.index: Dict[Hashable, int] = {}
+        self.keys: Dict[int, Hashable] = {}
+        self.g: Dict[int, int|float] = {}
+        self._anchor: Dict[int, int] = {}
+        self._steps: Dict[int, int] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.index or key in self.closed
+
+    def add(self, key: Hashable, parent: int, action: Action, g: int|float) -> int:
+        node = self._count
+        self._count += 1
+        self.closed.add(key)
+        self.index[key] = node
+        self.keys[node] = key
+        self._link(node, parent, action, g)
+        return node
+
+    def update(self, node: int, parent: int, action: Action, g: int|float) -> None:
+        """
+        Update the predecessor and cost of a node of the frontier.
+
+        Expanded states are only kept in the filter, so they cannot be reopened.
+        """
+        if node not in self.g:
+            raise ValueError("A bitstate store cannot reopen expanded states.")
+        self._link(node, parent, action, g)
+
+    def _link(self, node: int, parent: int, action: Action, g: int|float) -> None:
+        """Link a node to its parent, keeping it as an anchor every anchor_interval steps."""
+        self.g[node] = g
+        if parent == NodeStore.ROOT or self._steps[parent] + 1 >= self.anchor_interval:
+            prev = NodeStore.ROOT if parent == NodeStore.ROOT else self._anchor[parent]
+            self._anchor[node] = self.anchors.add(self.keys[node], prev, action, g)
+            self._steps[node] = 0
+        else:
+            self._anchor[node] = self._anchor[parent]
+            self._steps[node] = self._steps[parent] + 1
+
+    def relax(self, key: Hashable, parent: int, action: Action, g: int|float) -> int|None:
+        if key in self:
+            return None
+        return self.add(key, parent, action, g)
+
+    def release(self, node: int) -> None:
+        del self.index[self.keys.pop(node)]
+        del self.g[node], self._anchor[node], self._steps[node]
+
+    def action(self, node: int) -> Action:
+        """Return the action leading to a node of the frontier, re-searched unless the node is an anchor."""
+        if self._steps[node] == 0:
+            return self.anchors.action(self._anchor[node])
+        return self.path(node)[-1]
+
+    def path(self, node: int) -> List[Action]:
+        """
+        Reconstruct the actions from the root to a node by re-searching between anchors.
+
+        Args:
+            node (int): The id of a node in the frontier.
+
+        Returns:
+            List[Action]: The actions leading to the node, starting with the action of the root.
+        """
+        chain = [self.keys[node]] if self._steps[node] > 0 else []
+        anchor = self._anchor[node]
+        while anchor != NodeStore.ROOT:
+            chain.append(self.anchors.keys[anchor])
+            root_action = self.anchors.action(anchor)
+            anchor = self.anchors.parents[anchor]
+        chain.reverse()
+        init = self.problem.initial_state()
+        state = next(state for state in (init if isinstance(init, (list, Iterator)) else [init])
+                     if self._key(state) == chain[0])
+        actions = [root_action]
+        for goal in chain[1:]:
+            segment = self._segment(state, goal)
+            for action in segment:
+                state = self.problem.result(state, action)
+            actions.extend(segment)
+        return actions
+
+    def nbytes(self) -> int:
+        # four dict entries per frontier node and the bit table
+        return len(self.closed._table) + self.anchors.nbytes() + 4 * 3 * 8 * len(self.keys)
+
+    def false_positive_rate(self) -> float:
+        """Return the estimated false positive rate of the closed set."""
+        return self.closed.false_positive_rate()
+
+    def _key(self, state: State) -> Hashable:
+        """Return the key of a state as the search stores it, canonical under the symmetries of the problem."""
+        return self.problem.canonical(self.problem.encode(state))
+
+    def _segment(self, start: State, goal: Hashable) -> List[Action]:
+        """Re-search the shortest actions from a state to one with the given key with an exact BFS."""
+        problem = copy(self.problem)
+        problem.initial_state = lambda: start
+        problem.is_goal = lambda state: self._key(state) == goal
+        solutions = BFS(problem).search()
+        assert solutions, "Anchors must be connected."
+        return solutions[0][1:]
@@ -0,0 +1,33 @@
+import os
+from typing import Dict
+
+import numpy as np
+
+def save_snapshot(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Atomically write a snapshot of binary arrays to a file.
+
+    Args:
+        path (str): The path of the snapshot file.
+        arrays (Dict[str, np.ndarray]): The named arrays of the snapshot.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+
+def load_snapshot(path: str) -> Dict[str, np.ndarray]:
+    """
+    Read a snapshot written by save_snapshot.
+
+    Args:
+        path (str): The path of the snapshot file.
+
+    Returns:
+        Dict[str, np.ndarray]: The named arrays of the snapshot.
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
@@ -0,0 +1,302 @@
+import os
+import shutil
+import tempfile
+from heapq import merge
+from itertools import groupby
+from struct import Struct
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .problem import HeuristicSearchProblem, Action, State
+from .best_first_search import BestFirstSearch
+
+_value = Struct("<dH") # g-cost and action code of a record
+
+class DiskHashTable:
+    """
+    An open-addressing hash table of fixed-width keys in memory-mapped files.
+
+    Each slot holds a key, its g-cost, the key of its parent and the code of the action leading
+    to it. The table doubles into a new file when it is half full.
+
+    Args:
+        directory (str): The directory of the table files.
+        width (int): The width of the keys in bytes.
+        capacity (int, optional): The initial number of slots, a power of two. Defaults to 2**16.
+    """
+    def __init__(self, directory: str, width: int, capacity: int = 2**16) -> None:
+        self.directory = directory
+        self.width = width
+        self.count = 0
+        self._generation = 0
+        self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.used[self._slot(key)]
+
+    def get(self, key: bytes) -> Tuple[float, bytes, int]|None:
+        """Return the g-cost, parent key and action code of a key, or None if absent."""
+        slot = self._slot(key)
+        if not self.used[slot]:
+            return None
+        return self.g[slot], self.parents[slot].tobytes(), self.actions[slot]
+
+    def put(self, key: bytes, g: float, parent: bytes, action: int) -> None:
+        """Insert or overwrite the record of a key."""
+        slot = self._slot(key)
+        if not self.used[slot]:
+            self.count += 1
+            self.used[slot] = True
+            self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self.g[slot] = g
+        self.parents[slot] = np.frombuffer(parent, dtype=np.uint8)
+        self.actions[slot] = action
+        if self.count * 2 > self.capacity:
+            self._grow()
+
+    def close(self) -> None:
+        """Flush the table to its files and drop the arrays, which unmaps the files once no view refers to them."""
+        for name in ("used", "keys", "g", "parents", "actions"):
+            getattr(self, name).flush()
+            delattr(self, name)
+
+    def nbytes(self) -> int:
+        """Return the size of the table files in bytes, paged in and out of memory by the system."""
+        return sum(array.nbytes for array in (self.used, self.keys, self.g, self.parents, self.actions))
+
+    def _slot(self, key: bytes) -> int:
+        slot = hash(key) & (self.capacity - 1)
+        while self.used[slot] and self.keys[slot].tobytes() != key:
+            slot = (slot + 1) & (self.capacity - 1)
+        return slot
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        prefix = os.path.join(self.directory, f"closed{self._generation}")
+        self._generation += 1
+        self.used = np.memmap(f"{prefix}.used", dtype=np.bool_, mode="w+", shape=(capacity,))
+        self.keys = np.memmap(f"{prefix}.keys", dtype=np.uint8, mode="w+", shape=(capacity, self.width))
+        self.g = np.memmap(f"{prefix}.g", dtype=np.float64, mode="w+", shape=(capacity,))
+        self.parents = np.memmap(f"{prefix}.parents", dtype=np.uint8, mode="w+", shape=(capacity, self.width))
+        self.actions = np.memmap(f"{prefix}.actions", dtype=np.uint16, mode="w+", shape=(capacity,))
+
+    def _grow(self) -> None:
+        old = (self.used, self.keys, self.g, self.parents, self.actions)
+        old_files = [array.filename for array in old]
+        self._allocate(self.capacity * 2)
+        self.count = 0
+        used, keys, g, parents, actions = old
+        for slot in np.flatnonzero(used):
+            self.put(keys[slot].tobytes(), g[slot], parents[slot].tobytes(), actions[slot])
+        del old, used, keys, g, parents, actions # unmaps the old files
+        for filename in old_files:
+            os.remove(filename)
+
+class FrontierBuckets:
+    """
+    A frontier of records bucketed by f-value, spilled to sorted run files on disk.
+
+    Records of a bucket are buffered in memory and written as a run file sorted by key once the
+    buffer is full. Popping a bucket merges its runs so that duplicates come out adjacent.
+
+    Args:
+        directory (str): The directory of the run files.
+        width (int): The width of the keys in bytes.
+        buffer_size (int, optional): The number of records buffered per bucket. Defaults to 100_000.
+    """
+    def __init__(self, directory: str, width: int, buffer_size: int = 100_000) -> None:
+        self.directory = directory
+        self.width = width
+        self.record_size = 2 * width + _value.size
+        self.buffer_size = buffer_size
+        self._buffers: Dict[float, List[bytes]] = {}
+        self._runs: Dict[float, List[str]] = {}
+        self._sizes: Dict[float, int] = {}
+        self._next_run = 0
+        self.size = 0 # records put and not popped, duplicates included
+
+    def empty(self) -> bool:
+        return not self._buffers and not self._runs
+
+    def min_f(self) -> float:
+        return min(self._buffers.keys() | self._runs.keys())
+
+    def buffered(self) -> int:
+        """Return the number of records buffered in memory."""
+        return sum(map(len, self._buffers.values()))
+
+    def spill(self) -> None:
+        """Write every buffer to a run file, emptying the memory of the frontier."""
+        for f in list(self._buffers):
+            self._spill(f)
+
+    def put(self, f: float, key: bytes, g: float, parent: bytes, action: int) -> None:
+        buffer = self._buffers.setdefault(f, [])
+        buffer.append(key + parent + _value.pack(g, action))
+        self._sizes[f] = self._sizes.get(f, 0) + 1
+        self.size += 1
+        if len(buffer) >= self.buffer_size:
+            self._spill(f)
+
+    def pop(self, f: float) -> Iterator[Tuple[bytes, float, bytes, int]]:
+        """
+        Remove a bucket and iterate over its records, keeping the cheapest record of each key.
+
+        Args:
+            f (float): The f-value of the bucket.
+
+        Yields:
+            Tuple[bytes, float, bytes, int]: The key, g-cost, parent key and action code of a record.
+        """
+        runs = self._runs.pop(f, [])
+        buffer = sorted(self._buffers.pop(f, []))
+        self.size -= self._sizes.pop(f, 0)
+        width = self.width
+        try:
+            records = merge(buffer, *[self._read(run) for run in runs])
+            for key, group in groupby(records, key=lambda record: record[:width]):
+                best = None
+                for record in group:
+                    g, action = _value.unpack_from(record, 2 * width)
+                    if best is None or g < best[1]:
+                        best = (key, g, record[width:2 * width], action)
+                yield best
+        finally:
+            for run in runs:
+                os.remove(run)
+
+    def _spill(self, f: float) -> None:
+        path = os.path.join(self.directory, f"run{self._next_run}.dat")
+        self._next_run += 1
+        with open(path, "wb") as file:
+            file.write(b"".join(sorted(self._buffers.pop(f))))
+        self._runs.setdefault(f, []).append(path)
+
+    def _read(self, path: str, chunk: int = 4096) -> Iterator[bytes]:
+        size = self.record_size
+        with open(path, "rb") as file:
+            while data := file.read(size * chunk):
+                for i in range(0, len(data), size):
+                    yield data[i:i + size]
+
+class ExternalAStar(BestFirstSearch):
+    """
+    External-memory A* for state spaces larger than RAM.
+
+    The closed set with g-costs and predecessors is kept in a memory-mapped hash table, and the
+    frontier in buckets per f-value that spill to sorted run files. Each f-layer is merged from
+    its runs to detect duplicates before expansion. The problem must encode states as
+    fixed-width bytes (see SearchProblem.encode). The files are created in a temporary
+    directory when the search starts and removed when it returns.
+
+    Under a memory budget (see limit_memory), the search first clears the caches of the problem
+    and then spills the frontier buffers to disk each time the budget is exceeded, so it has no
+    fallback. It keeps no snapshots, so checkpoint does nothing.
+
+    Args:
+        problem (HeuristicSearchProblem): The heuristic search problem.
+        weight (float|int, optional): The weight of the heuristic. Defaults to 1.
+        directory (str|None, optional): The directory for the files, the system temp directory if None. Defaults to None.
+        buffer_size (int, optional): The number of frontier records buffered in memory per f-value. Defaults to 100_000.
+
+    Attributes:
+        nodes (DiskHashTable|None): The closed set while searching.
+        frontier (FrontierBuckets|None): The frontier while searching.
+    """
+    def __init__(self, problem: HeuristicSearchProblem, weight: float|int = 1,
+                 directory: str|None = None, buffer_size: int = 100_000) -> None:
+        self.weight = weight
+        self.directory = directory
+        self.buffer_size = buffer_size
+        super().__init__(problem)
+
+    def reset(self, nodes: DiskHashTable|None = None) -> None:
+        init = self.problem.initial_state()
+        self._init = list(init) if isinstance(init, (list, Iterator)) else [init]
+        keys = [self.problem.encode(state) for state in self._init]
+        assert all(isinstance(key, bytes) and len(key) == len(keys[0]) for key in keys), \
+            "External search needs fixed-width byte keys."
+        self.width = len(keys[0])
+        self.nodes = nodes
+        self.frontier = None
+        self.action_table: List[Action] = [Action.STAY]
+        self._action_codes: Dict[Action, int] = {Action.STAY: 0}
+        self.expanded = 0
+
+    def checkpoint(self, path: str, every: int = 100_000) -> None:
+        """Do nothing, since the nodes are in temporary files removed when the search returns."""
+        return None
+
+    def memory(self) -> Dict[str, int]:
+        """Return the approximate memory in bytes of the frontier buffers and the caches of the problem, the nodes being on disk."""
+        frontier = 0 if self.frontier is None else self.frontier.record_size * self.frontier.buffered()
+        return {"nodes": 0, "frontier": frontier, "caches": self.problem.cache_size()}
+
+    def search(self) -> List[List[Action]]:
+        workdir = tempfile.mkdtemp(prefix="sealgo-", dir=self.directory)
+        if self.nodes is None:
+            self.nodes = DiskHashTable(workdir, self.width)
+        self.frontier = FrontierBuckets(workdir, self.width, self.buffer_size)
+        self.stats.start([self.problem])
+        try:
+            for state in self._init:
+                key = self.problem.encode(state)
+                self.frontier.put(self.weight * self._h(state), key, 0, key, 0)
+            while not self.frontier.empty():
+                for key, g, parent, action in self.frontier.pop(self.frontier.min_f()):
+                    known = self.nodes.get(key)
+                    if known is not None and known[0] <= g:
+                        self.stats.duplicates += 1
+                        continue
+                    self.nodes.put(key, g, parent, action)
+                    state = self.problem.decode(key)
+                    if self.problem.is_goal(state):
+                        self.status = "solved"
+                        return [self._reconstruct_path(key)]
+                    self._extend_external(key, g, state)
+                    self.expanded += 1
+                    if self.memory_budget is not None and self.expanded % self.memory_budget.every == 0:
+                        self._record_memory()
+                        if self.memory_budget.exceeded() and not self.memory_budget.relieve(self.problem):
+                            self.frontier.spill()
+            self.status = "failed"
+            return []
+        finally:
+            self._record_memory()
+            self.stats.expanded = self.expanded
+            self.stats.stop([self.problem])
+            self.nodes.close()
+            self.nodes = self.frontier = None
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _extend_external(self, key: bytes, g: float, state: State) -> None:
+        for action in self.problem.actions(state):
+            next_state = self.problem.result(state, action)
+            next_g = g + self.problem.action_cost(state, action)
+            f = next_g + self.weight * self._h(next_state)
+            self.frontier.put(f, self.problem.encode(next_state), next_g, key, self._code(action))
+            self.stats.generated += 1
+        self.stats.peak_frontier = max(self.stats.peak_frontier, self.frontier.size)
+
+    def _reconstruct_path(self, key: bytes) -> List[Action]:
+        actions = []
+        while True:
+            _, parent, action = self.nodes.get(key)
+            actions.append(self.action_table[action])
+            if parent == key:
+                break
+            key = parent
+        actions.reverse()
+        return actions
+
+    def _code(self, action: Action) -> int:
+        code = self._action_codes.get(action)
+        if code is None:
+            code = len(self.action_table)
+            self._action_codes[action] = code
+            self.action_table.append(action)
+        return code
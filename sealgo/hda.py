@@ -0,0 +1,223 @@
+import os
+import zlib
+import traceback
+from heapq import heappush, heappop
+from multiprocessing import Array, Event, Process, Queue
+from queue import Empty
+from typing import Dict, Iterator, List, Tuple
+
+from .problem import HeuristicSearchProblem, Action, State
+from .search import Search
+from .node_store import NodeStore
+
+Record = Tuple[bytes, float, bytes|None, Action] # key, g-cost, parent key and action of a generated state
+
+class HDAStar(Search):
+    """
+    Hash-distributed A* over several worker processes.
+
+    Each state is owned by the worker chosen by a hash of its compact key, which keeps its node
+    and frontier entry and computes its heuristic. Generated states are sent to their owners in
+    batches over queues. The search ends when a worker expands a goal, or when every worker is
+    idle and every sent batch has been received. A worker that raises or dies stops the search,
+    which terminates the other workers and raises a RuntimeError. Like weighted A*, the first goal is returned, so
+    with several workers the solution is not guaranteed optimal even with weight 1.
+
+    The problem must encode states as bytes (see SearchProblem.encode) and be picklable.
+
+    Args:
+        problem (HeuristicSearchProblem): The heuristic search problem.
+        weight (float|int, optional): The weight of the heuristic. Defaults to 1.
+        workers (int|None, optional): The number of worker processes, the number of CPUs if None. Defaults to None.
+        batch_size (int, optional): The number of expansions between sending the buffered states. Defaults to 64.
+
+    Attributes:
+        expanded (List[int]): The number of expansions of each worker in the last search.
+    """
+    def __init__(self, problem: HeuristicSearchProblem, weight: float|int = 1,
+                 workers: int|None = None, batch_size: int = 64) -> None:
+        super().__init__(problem)
+        self.weight = weight
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.expanded: List[int] = []
+
+    def search(self) -> List[List[Action]]:
+        n = self.workers
+        inboxes = [Queue() for _ in range(n)]
+        results = Queue()
+        halt = Event()
+        # termination counters, written by the workers and read here
+        sent, received, idle, expanded = Array('q', n), Array('q', n), Array('b', n), Array('q', n)
+        processes = [Process(target=_work, args=(i, self.problem, self.weight, self.batch_size, inboxes, results,
+                                                  halt, sent, received, idle, expanded), daemon=True)
+                     for i in range(n)]
+        for process in processes:
+            process.start()
+        # the workers use copies of the problem, so only the time and the expansions are counted here
+        self.stats.start([])
+        failed = True
+        try:
+            init = self.problem.initial_state()
+            batches: Dict[int, List[Record]] = {}
+            for state in (init if isinstance(init, (list, Iterator)) else [init]):
+                key = self.problem.encode(state)
+                batches.setdefault(_owner(key, n), []).append((key, 0, None, Action.STAY))
+            for owner, batch in batches.items():
+                inboxes[owner].put(("states", batch))
+            goal = self._wait(results, processes, sent, received, idle, len(batches))
+            halt.set()
+            solutions = [] if goal is None else [self._reconstruct_path(goal, inboxes, results, processes)]
+            failed = False
+        finally:
+            halt.set()
+            for inbox in inboxes:
+                inbox.put(("exit",))
+            for process in processes:
+                # the surviving workers of a failed search may be blocked on their queues
+                if failed:
+                    process.terminate()
+                process.join()
+            self.expanded = list(expanded)
+            self.stats.expanded += sum(self.expanded)
+            self.stats.stop([])
+        return solutions
+
+    def _wait(self, results: Queue, processes: List[Process], sent, received, idle, initial: int) -> bytes|None:
+        """Wait for a worker to expand a goal, returning its key, or for the workers to run out of states."""
+        last = None
+        while True:
+            message = self._receive(results, processes)
+            if message is not None:
+                return message[1]
+            # a consistent quiet state must be seen twice, since the counters are read while they change
+            counts = (initial + sum(sent), sum(received))
+            quiet = all(idle) and counts[0] == counts[1]
+            if quiet and counts == last:
+                return None
+            last = counts if quiet else None
+
+    def _receive(self, results: Queue, processes: List[Process]) -> Tuple|None:
+        """
+        Return the next message of the workers, or None if there is none for a while.
+
+        Raises:
+            RuntimeError: If a worker raised an exception or exited before being told to.
+        """
+        try:
+            message = results.get(timeout=0.05)
+        except Empty:
+            dead = [i for i, process in enumerate(processes) if not process.is_alive()]
+            if not dead:
+                return None
+            # a worker that raised sent its traceback before exiting
+            try:
+                message = results.get(timeout=0.5)
+            except Empty:
+                message = None
+            if message is None or message[0] != "error":
+                raise RuntimeError(f"HDA* worker {dead[0]} exited with code {processes[dead[0]].exitcode}.")
+        if message[0] == "error":
+            raise RuntimeError(f"HDA* worker {message[1]} failed:\n{message[2]}")
+        return message
+
+    def _reconstruct_path(self, key: bytes, inboxes: List[Queue], results: Queue, processes: List[Process]) -> List[Action]:
+        """Follow the parent keys of a goal from worker to worker back to an initial state."""
+        actions = []
+        while key is not None:
+            inboxes[_owner(key, self.workers)].put(("trace", key))
+            message = None
+            while message is None or message[0] != "trace": # goals found by other workers before the halt
+                message = self._receive(results, processes)
+            _, key, action = message
+            actions.append(action)
+        actions.reverse()
+        return actions
+
+def _owner(key: bytes, workers: int) -> int:
+    """Return the worker owning a key, stable across processes unlike the built-in hash."""
+    return zlib.crc32(key) % workers
+
+def _work(i: int, problem: HeuristicSearchProblem, weight: float|int, batch_size: int, inboxes: List[Queue],
+          results: Queue, halt, sent, received, idle, expanded) -> None:
+    """Run worker i, sending the traceback of an exception to the main process, which may not be able to unpickle it."""
+    try:
+        _search(i, problem, weight, batch_size, inboxes, results, halt, sent, received, idle, expanded)
+    except Exception:
+        results.put(("error", i, traceback.format_exc()))
+
+def _search(i: int, problem: HeuristicSearchProblem, weight: float|int, batch_size: int, inboxes: List[Queue],
+            results: Queue, halt, sent, received, idle, expanded) -> None:
+    """Run the A* of worker i over the states it owns until told to exit."""
+    n = len(inboxes)
+    nodes = NodeStore()
+    parent_keys: List[bytes|None] = []
+    frontier: List[Tuple[float, int]] = []
+    outboxes: Dict[int, List[Record]] = {}
+
+    def relax(key: bytes, g: float, parent: bytes|None, action: Action, state: State|None = None) -> None:
+        count = len(nodes)
+        node = nodes.relax(key, NodeStore.ROOT, action, g)
+        if node is None:
+            return
+        if node == count:
+            parent_keys.append(parent)
+        else:
+            parent_keys[node] = parent
+        if state is None:
+            state = problem.decode(key)
+        heappush(frontier, (g + weight * problem.heuristic(state), node))
+
+    def flush() -> None:
+        for owner, batch in outboxes.items():
+            inboxes[owner].put(("states", batch))
+            sent[i] += 1
+        outboxes.clear()
+
+    while True:
+        # handle the messages, blocking only when there is nothing to expand
+        block = not frontier or halt.is_set()
+        while True:
+            try:
+                message = inboxes[i].get(timeout=0.01) if block else inboxes[i].get_nowait()
+            except Empty:
+                break
+            block = False
+            match message:
+                case ("exit",):
+                    return
+                case ("trace", key):
+                    node = nodes.get(key)
+                    results.put(("trace", parent_keys[node], nodes.action(node)))
+                case ("states", batch):
+                    idle[i] = 0
+                    received[i] += 1
+                    if not halt.is_set():
+                        for record in batch:
+                            relax(*record)
+        if halt.is_set():
+            continue
+        for _ in range(batch_size):
+            if not frontier:
+                break
+            _, node = heappop(frontier)
+            key = nodes.keys[node]
+            state = problem.decode(key)
+            if problem.is_goal(state):
+                results.put(("goal", key))
+                halt.set()
+                break
+            expanded[i] += 1
+            g = nodes.g[node]
+            for action in problem.actions(state):
+                next_state = problem.result(state, action)
+                next_key = problem.encode(next_state)
+                next_g = g + problem.action_cost(state, action)
+                owner = _owner(next_key, n)
+                if owner == i:
+                    relax(next_key, next_g, key, action, next_state)
+                else:
+                    outboxes.setdefault(owner, []).append((next_key, next_g, key, action))
+        flush()
+        if not frontier:
+            idle[i] = 1
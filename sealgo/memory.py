@@ -0,0 +1,76 @@
+import gc
+import os
+import resource
+import tracemalloc
+from typing import Callable, List
+
+from .problem import SearchProblem, Action
+from .search import Search
+
+# list slot, (f, node) tuple, float and int of a frontier entry
+FRONTIER_ENTRY = 8 + 56 + 24 + 28
+
+def resident_memory() -> int:
+    """Return the memory traced by tracemalloc if it is tracing, else the resident memory of the process, in bytes."""
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError: # not Linux, the peak will do
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class MemoryBudget:
+    """
+    A memory budget of a search, with the steps the search takes when it is exceeded.
+
+    The memory is sampled every `every` expansions (see resident_memory). The first time it is over
+    the budget, the search clears the caches of its problem. The resident memory seldom drops, but
+    the freed memory is reused before the process grows again. The next time, the search drops its
+    nodes and runs the fallback search from the initial state, or gives up with the status
+    "memory_limit" if there is none.
+
+    Args:
+        max_memory (int): The budget in bytes.
+        every (int, optional): The number of expansions between samples. Defaults to 10_000.
+        fallback (Callable[[SearchProblem], Search]|None, optional): Builds the search run when the
+            budget is exceeded, e.g. functools.partial(BeamSearch, width=1000). Defaults to None.
+
+    Attributes:
+        usage (int): The last sample of the memory in bytes.
+        cleared (bool): Whether the caches of the problem have been cleared.
+        status (str|None): "memory_limit" or "fallback" once the nodes are dropped, None before.
+
+    Methods:
+        exceeded() -> bool: Samples the memory and returns whether it is over the budget.
+        relieve(problem: SearchProblem) -> bool: Clears the caches of a problem if not done yet, returning whether it was.
+        fall_back(problem: SearchProblem) -> List[List[Action]]: Runs the fallback search, if any.
+    """
+    def __init__(self, max_memory: int, every: int = 10_000, fallback: Callable[[SearchProblem], Search]|None = None) -> None:
+        self.max_memory = max_memory
+        self.every = every
+        self.fallback = fallback
+        self.usage = 0
+        self.cleared = False
+        self.status: str|None = None
+
+    def exceeded(self) -> bool:
+        self.usage = resident_memory()
+        return self.usage > self.max_memory
+
+    def relieve(self, problem: SearchProblem) -> bool:
+        if self.cleared:
+            return False
+        self.cleared = True
+        problem.clear_caches()
+        gc.collect()
+        return True
+
+    def fall_back(self, problem: SearchProblem) -> List[List[Action]]:
+        """Run the fallback search once the nodes of the search are dropped, or give up without one."""
+        gc.collect()
+        if self.fallback is None:
+            self.status = "memory_limit"
+            return []
+        self.status = "fallback"
+        return self.fallback(problem).search()
@@ -0,0 +1,365 @@
+import sys
+import pickle
+from math import inf
+from array import array
+from typing import Dict, Hashable, List
+
+import numpy as np
+
+from .problem import Action
+
+class NodeStore:
+    """
+    Compact storage of the nodes discovered by a search.
+
+    Each discovered state is assigned a dense integer id. Parent ids, g-costs and action codes
+    are kept in growable typed arrays, and a single hash index maps the compact key of a state
+    (see SearchProblem.encode) to its id.
+
+    Attributes:
+        index (Dict[Hashable, int]): The map from state keys to node ids.
+        keys (List[Hashable]): The state key of each node.
+        parents (array): The parent id of each node, ROOT for the initial states.
+        replays (bool): Whether path() follows the actual states when the keys are canonical
+            (see SearchProblem.canonical), so that searches need not replay it. False here.
+        g (array): The cost so far of each node.
+        actions (array): The code of the action leading to each node.
+        action_table (List[Action]): The action of each action code.
+
+    Methods:
+        add(key, parent, action, g) -> int: Add a new node and return its id.
+        update(node, parent, action, g) -> None: Update the predecessor and cost of a node.
+        relax(key, parent, action, g) -> int|None: Add or update a node if the path to it is new or cheaper.
+        release(node) -> None: Notify the store that a node has been expanded.
+        get(key) -> int|None: Return the id of the node with the given key.
+        action(node) -> Action: Return the action leading to a node.
+        path(node) -> List[Action]: Return the actions from the root to a node.
+        nbytes() -> int: Return the approximate memory used by the store.
+        snapshot() -> Dict[str, np.ndarray]: Return the store as binary arrays.
+        restore(arrays) -> NodeStore: Create a store from the arrays of a snapshot.
+    """
+    ROOT = -1
+    replays = False
+
+    def __init__(self) -> None:
+        self.index: Dict[Hashable, int] = {}
+        self.keys: List[Hashable] = []
+        self.parents = array('i')
+        self.g = array('d')
+        self.actions = array('H')
+        self.action_table: List[Action] = []
+        self._action_codes: Dict[Action, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.index
+
+    def get(self, key: Hashable) -> int|None:
+        return self.index.get(key)
+
+    def add(self, key: Hashable, parent: int, action: Action, g: int|float) -> int:
+        """
+        Add a new node.
+
+        Args:
+            key (Hashable): The compact key of the state.
+            parent (int): The id of the parent node, ROOT for an initial state.
+            action (Action): The action leading from the parent to the state.
+            g (int|float): The cost so far of the state.
+
+        Returns:
+            int: The id of the new node.
+        """
+        node = len(self.keys)
+        self.index[key] = node
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.g.append(g)
+        self.actions.append(self._code(action))
+        return node
+
+    def update(self, node: int, parent: int, action: Action, g: int|float) -> None:
+        """Update the predecessor and cost of an existing node."""
+        self.parents[node] = parent
+        self.g[node] = g
+        self.actions[node] = self._code(action)
+
+    def relax(self, key: Hashable, parent: int, action: Action, g: int|float) -> int|None:
+        """
+        Record a path to a state if it is new or cheaper than the known one.
+
+        Args:
+            key (Hashable): The compact key of the state.
+            parent (int): The id of the parent node.
+            action (Action): The action leading from the parent to the state.
+            g (int|float): The cost so far of the state along the path.
+
+        Returns:
+            int|None: The id of the state's node if the path was recorded, None otherwise.
+        """
+        node = self.index.get(key)
+        if node is None:
+            return self.add(key, parent, action, g)
+        if g < self.g[node]:
+            self.update(node, parent, action, g)
+            return node
+        return None
+
+    def release(self, node: int) -> None:
+        """Notify the store that a node has been expanded. Exact stores keep every node."""
+        pass
+
+    def action(self, node: int) -> Action:
+        return self.action_table[self.actions[node]]
+
+    def path(self, node: int) -> List[Action]:
+        """
+        Return the actions from the root to a node, starting with the action of the root.
+
+        Args:
+            node (int): The id of the node.
+
+        Returns:
+            List[Action]: The actions leading to the node.
+        """
+        actions = []
+        while node != self.ROOT:
+            actions.append(self.action_table[self.actions[node]])
+            node = self.parents[node]
+        actions.reverse()
+        return actions
+
+    def nbytes(self) -> int:
+        """Return the approximate memory used by the store in bytes."""
+        if not self.keys:
+            return 0
+        arrays = sum(a.itemsize * len(a) for a in (self.parents, self.g, self.actions))
+        # hash index entry, list slot and the key object itself
+        per_key = 3 * 8 + 8 + sys.getsizeof(self.keys[0])
+        return arrays + per_key * len(self.keys)
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Return the store as binary arrays. The state keys must be bytes.
+
+        Returns:
+            Dict[str, np.ndarray]: The keys, parents, g-costs, action codes and action table of the store.
+        """
+        if self.keys and not isinstance(self.keys[0], bytes):
+            raise TypeError("Only stores of byte keys can be saved, see SearchProblem.encode.")
+        return {
+            "keys": np.frombuffer(b"".join(self.keys), dtype=np.uint8),
+            "key_lengths": np.fromiter(map(len, self.keys), dtype=np.int64, count=len(self.keys)),
+            "parents": np.array(self.parents, dtype=np.int32),
+            "g": np.array(self.g, dtype=np.float64),
+            "actions": np.array(self.actions, dtype=np.uint16),
+            "action_table": np.frombuffer(pickle.dumps(self.action_table), dtype=np.uint8),
+        }
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray]) -> "NodeStore":
+        """
+        Create a store from the arrays of a snapshot.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): The arrays returned by snapshot().
+
+        Returns:
+            NodeStore: The restored store.
+        """
+        store = cls()
+        blob = arrays["keys"].tobytes()
+        ends = np.cumsum(arrays["key_lengths"]).tolist()
+        store.keys = [blob[start:end] for start, end in zip([0] + ends[:-1], ends)]
+        store.index = {key: node for node, key in enumerate(store.keys)}
+        store.parents = array('i', arrays["parents"].astype(np.int32).tobytes())
+        store.g = array('d', arrays["g"].astype(np.float64).tobytes())
+        store.actions = array('H', arrays["actions"].astype(np.uint16).tobytes())
+        store.action_table = pickle.loads(arrays["action_table"].tobytes())
+        store._action_codes = {action: code for code, action in enumerate(store.action_table)}
+        return store
+
+    def _code(self, action: Action) -> int:
+        code = self._action_codes.get(action)
+        if code is None:
+            code = len(self.action_table)
+            self._action_codes[action] = code
+            self.action_table.append(action)
+        return code
+
+class DirectionView(NodeStore):
+    """
+    The nodes of one direction of a BiNodeStore, used as the node store of that direction's search.
+
+    The view shares the keys and the index of the store, and keeps its own parents, g-costs and
+    action codes over the shared ids. Only the keys reached in its direction are visible.
+
+    Args:
+        store (BiNodeStore): The shared store.
+        direction (int): BiNodeStore.FORWARD or BiNodeStore.BACKWARD.
+    """
+    def __init__(self, store: "BiNodeStore", direction: int) -> None:
+        super().__init__()
+        self.store = store
+        self.direction = direction
+        self.index = store.index
+        self.keys = store.keys
+        self._bit = 1 << direction
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable) -> int|None:
+        node = self.index.get(key)
+        if node is None or not self.store.directions[node] & self._bit:
+            return None
+        return node
+
+    def add(self, key: Hashable, parent: int, action: Action, g: int|float) -> int:
+        node = self.store._entry(key)
+        self.parents[node] = parent
+        self.g[node] = g
+        self.actions[node] = self._code(action)
+        self.store.directions[node] |= self._bit
+        self._count += 1
+        self.store._meet(node)
+        return node
+
+    def update(self, node: int, parent: int, action: Action, g: int|float) -> None:
+        super().update(node, parent, action, g)
+        self.store._meet(node)
+
+    def relax(self, key: Hashable, parent: int, action: Action, g: int|float) -> int|None:
+        node = self.get(key)
+        if node is None:
+            return self.add(key, parent, action, g)
+        if g < self.g[node]:
+            self.update(node, parent, action, g)
+            return node
+        return None
+
+    def nbytes(self) -> int:
+        """Return the memory used by the arrays of the view in bytes, see BiNodeStore.nbytes for the shared keys."""
+        return sum(a.itemsize * len(a) for a in (self.parents, self.g, self.actions))
+
+class BiNodeStore:
+    """
+    Node store shared by the forward and backward searches of a bidirectional search.
+
+    Each key is stored once with a bitmask of the directions that reached it, and each direction
+    sees the store through a DirectionView. When a key is added or improved in one direction and
+    has already been reached from the other, the store records a meeting, keeping the cheapest.
+
+    Attributes:
+        index (Dict[Hashable, int]): The map from state keys to node ids.
+        keys (List[Hashable]): The state key of each node.
+        directions (bytearray): The bitmask of the directions that reached each node.
+        views (Tuple[DirectionView, DirectionView]): The forward and backward views.
+        best_cost (float): The cost of the cheapest meeting.
+        best_key (Hashable|None): The key of the cheapest meeting.
+
+    Methods:
+        view(direction) -> DirectionView: Return the view of a direction.
+        meet(key, cost) -> None: Record a path of the given cost through a key if it is the cheapest.
+        nbytes() -> int: Return the approximate memory used by the store.
+        snapshot() -> Dict[str, np.ndarray]: Return the store as binary arrays.
+        restore(arrays) -> BiNodeStore: Create a store from the arrays of a snapshot.
+    """
+    FORWARD = 0
+    BACKWARD = 1
+
+    def __init__(self) -> None:
+        self.index: Dict[Hashable, int] = {}
+        self.keys: List[Hashable] = []
+        self.directions = bytearray()
+        self.views = (DirectionView(self, self.FORWARD), DirectionView(self, self.BACKWARD))
+        self.best_cost = inf
+        self.best_key: Hashable|None = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def view(self, direction: int) -> DirectionView:
+        return self.views[direction]
+
+    def meet(self, key: Hashable, cost: int|float) -> None:
+        if cost < self.best_cost:
+            self.best_cost = cost
+            self.best_key = key
+
+    def nbytes(self) -> int:
+        """Return the approximate memory used by the store and both views in bytes."""
+        if not self.keys:
+            return 0
+        per_key = 3 * 8 + 8 + 1 + sys.getsizeof(self.keys[0])
+        return per_key * len(self.keys) + sum(view.nbytes() for view in self.views)
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Return the store as binary arrays, with the arrays of each view prefixed by "f_" or "b_".
+
+        Returns:
+            Dict[str, np.ndarray]: The keys, directions, best meeting and the arrays of both views.
+        """
+        forward, backward = self.views
+        arrays = {
+            "directions": np.frombuffer(bytes(self.directions), dtype=np.uint8),
+            "best_cost": np.array(self.best_cost, dtype=np.float64),
+            "best_key": np.frombuffer(self.best_key or b"", dtype=np.uint8),
+        }
+        for prefix, view in (("f_", forward), ("b_", backward)):
+            arrays.update({prefix + name: array for name, array in NodeStore.snapshot(view).items()})
+        arrays["keys"], arrays["key_lengths"] = arrays.pop("f_keys"), arrays.pop("f_key_lengths")
+        del arrays["b_keys"], arrays["b_key_lengths"]
+        return arrays
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray]) -> "BiNodeStore":
+        """
+        Create a store from the arrays of a snapshot.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): The arrays returned by snapshot().
+
+        Returns:
+            BiNodeStore: The restored store.
+        """
+        store = cls()
+        store.directions = bytearray(arrays["directions"].tobytes())
+        store.best_cost = float(arrays["best_cost"])
+        store.best_key = arrays["best_key"].tobytes() if store.best_cost < inf else None
+        for prefix, view in (("f_", store.views[0]), ("b_", store.views[1])):
+            restored = NodeStore.restore({"keys": arrays["keys"], "key_lengths": arrays["key_lengths"],
+                                          **{name[2:]: array for name, array in arrays.items() if name.startswith(prefix)}})
+            view.parents, view.g, view.actions = restored.parents, restored.g, restored.actions
+            view.action_table, view._action_codes = restored.action_table, restored._action_codes
+            view._count = sum(1 for bits in store.directions if bits & view._bit)
+        store.keys.extend(restored.keys)
+        store.index.update(restored.index)
+        return store
+
+    def _entry(self, key: Hashable) -> int:
+        """Return the id of a key, adding an entry unreached in both directions if it is new."""
+        node = self.index.get(key)
+        if node is None:
+            node = len(self.keys)
+            self.index[key] = node
+            self.keys.append(key)
+            self.directions.append(0)
+            for view in self.views:
+                view.parents.append(NodeStore.ROOT)
+                view.g.append(inf)
+                view.actions.append(0)
+        return node
+
+    def _meet(self, node: int) -> None:
+        """Record a meeting at a node if both directions reached it."""
+        if self.directions[node] == 3:
+            forward, backward = self.views
+            self.meet(self.keys[node], forward.g[node] + backward.g[node])
@@ -0,0 +1,78 @@
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+
+import numpy as np
+
+class SampleChannel:
+    """
+    A ring buffer in shared memory through which a search publishes samples of the states it expands.
+
+    The search offers the key of every state it expands, and at most `rate` keys per second are
+    written, so the cost to the search is a clock read per expansion. The writer never waits: each
+    slot has a sequence number, cleared while the slot is written and set after, so a reader in
+    another process skips the slots that changed under it. A reader that falls behind by more than
+    the capacity of the buffer loses the oldest samples.
+
+    Pickling a channel only sends the name of its block, and unpickling attaches to it.
+
+    Args:
+        key_size (int): The maximum size in bytes of the keys (see SearchProblem.encode).
+        capacity (int, optional): The number of samples kept in the buffer. Defaults to 256.
+        rate (float, optional): The maximum number of samples written per second. Defaults to 60.
+
+    Methods:
+        offer(key: bytes) -> None: Writes a key if the last sample is old enough.
+        read() -> List[bytes]: Returns the keys written since the last read.
+        close() -> None: Detaches from the buffer, freeing it if this channel created it.
+    """
+    def __init__(self, key_size: int, capacity: int = 256, rate: float = 60, name: str|None = None) -> None:
+        self.key_size = key_size
+        self.capacity = capacity
+        self.rate = rate
+        size = 8 + capacity * (8 + 4 + key_size)
+        self._owner = name is None
+        self._shm = SharedMemory(create=True, size=size) if name is None else SharedMemory(name=name)
+        buffer = self._shm.buf
+        self._head = np.ndarray((1,), np.uint64, buffer, 0)
+        self._seqs = np.ndarray((capacity,), np.uint64, buffer, 8)
+        self._lengths = np.ndarray((capacity,), np.uint32, buffer, 8 + 8 * capacity)
+        self._data = np.ndarray((capacity, key_size), np.uint8, buffer, 8 + 12 * capacity)
+        self._interval = 1 / rate
+        self._next = 0.0
+        self._read = int(self._head[0])
+
+    def __reduce__(self):
+        return SampleChannel, (self.key_size, self.capacity, self.rate, self._shm.name)
+
+    def offer(self, key: bytes) -> None:
+        now = time.perf_counter()
+        if now < self._next:
+            return
+        self._next = now + self._interval
+        head = int(self._head[0])
+        slot = head % self.capacity
+        self._seqs[slot] = 0
+        self._data[slot, :len(key)] = np.frombuffer(key, dtype=np.uint8)
+        self._lengths[slot] = len(key)
+        self._seqs[slot] = head + 1
+        self._head[0] = head + 1
+
+    def read(self) -> List[bytes]:
+        head = int(self._head[0])
+        keys = []
+        for n in range(max(self._read, head - self.capacity), head):
+            slot = n % self.capacity
+            if self._seqs[slot] != n + 1:
+                continue
+            key = self._data[slot, :self._lengths[slot]].tobytes()
+            if self._seqs[slot] == n + 1: # not overwritten while it was copied
+                keys.append(key)
+        self._read = head
+        return keys
+
+    def close(self) -> None:
+        del self._head, self._seqs, self._lengths, self._data # the views must go before the block can be closed
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
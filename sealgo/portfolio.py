@@ -0,0 +1,144 @@
+import sys
+import time
+import signal
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from typing import Dict, List, Tuple, Type
+
+from .problem import SearchProblem, Action
+from .search import Search
+from .stats import SearchStats
+
+class SolverConfig:
+    """
+    A search configuration of a portfolio.
+
+    Args:
+        name (str): The name of the configuration in the results.
+        algo (Type[Search]): The search algorithm.
+        *args: Additional arguments to be passed to the search algorithm after the problem.
+        **kwargs: Additional keyword arguments to be passed to the search algorithm.
+
+    Usage:
+        SolverConfig("bidirectional", BiDirectional, AStar, weight=3)
+    """
+    def __init__(self, name: str, algo: Type[Search], *args, **kwargs) -> None:
+        self.name = name
+        self.algo = algo
+        self.args = args
+        self.kwargs = kwargs
+
+    def build(self, problem: SearchProblem) -> Search:
+        return self.algo(problem, *self.args, **self.kwargs)
+
+class Portfolio(Search):
+    """
+    Runs several search configurations on one problem in parallel processes.
+
+    The solution of the first configuration to succeed is returned, and the other processes are
+    terminated. A terminated search exits through its finally blocks and reports the statistics
+    it has gathered so far. The problem and the configurations must be picklable.
+
+    Args:
+        problem (SearchProblem): The search problem.
+        configs (List[SolverConfig]): The configurations to run.
+        time_limit (float|None, optional): The time budget in seconds, unlimited if None. Defaults to None.
+        grace_period (float, optional): The time in seconds a terminated search has to report before it is killed. Defaults to 5.
+
+    Attributes:
+        results (Dict[str, Dict]): The status ("solved", "failed", "error", "cancelled" or "timeout"), elapsed time,
+            solution length, number of nodes and search statistics of each configuration by name. The statistics
+            of a cancelled or timed out configuration are those of its search until then, if it reported in time.
+        stats (SearchStats): The statistics of the search of the winner.
+        winner (str|None): The name of the configuration whose solution was returned.
+    """
+    def __init__(self, problem: SearchProblem, configs: List[SolverConfig], time_limit: float|None = None,
+                 grace_period: float = 5) -> None:
+        super().__init__(problem)
+        self.configs = configs
+        self.time_limit = time_limit
+        self.grace_period = grace_period
+        self.results: Dict[str, Dict] = {}
+        self.winner: str|None = None
+
+    def search(self) -> List[List[Action]]:
+        self.results = {}
+        self._stats = SearchStats()
+        self.winner = None
+        start_time = time.perf_counter()
+        deadline = None if self.time_limit is None else start_time + self.time_limit
+        workers: Dict[Connection, Tuple[SolverConfig, Process]] = {}
+        try:
+            for config in self.configs:
+                receiver, sender = Pipe(duplex=False)
+                process = Process(target=_solve, args=(config, self.problem, sender), daemon=True)
+                process.start()
+                sender.close()
+                workers[receiver] = (config, process)
+            while workers:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                ready = wait(list(workers), timeout)
+                if not ready:
+                    break
+                for receiver in ready:
+                    config, process = workers.pop(receiver)
+                    solutions, result = _receive(receiver, process)
+                    if result is None:
+                        result = {"status": "error", "error": f"The worker exited with code {process.exitcode} without a result."}
+                    self.results[config.name] = result
+                    if solutions:
+                        self.winner = config.name
+                        self._stats = SearchStats.from_dict(result["stats"])
+                        return solutions
+            return []
+        finally:
+            status = "timeout" if deadline is not None and time.perf_counter() >= deadline else "cancelled"
+            for _, process in workers.values():
+                process.terminate()
+            for receiver, (config, process) in workers.items():
+                result = None
+                if receiver.poll(self.grace_period):
+                    _, result = _receive(receiver, process)
+                else:
+                    process.kill()
+                    process.join()
+                    receiver.close()
+                if result is None: # terminated before it could report
+                    result = {"status": "cancelled", "elapsed_time": time.perf_counter() - start_time}
+                if result["status"] == "cancelled":
+                    result["status"] = status
+                self.results[config.name] = result
+
+def _solve(config: SolverConfig, problem: SearchProblem, sender: Connection) -> None:
+    """Run one configuration in a worker process and send its solutions and result, partial if it is terminated."""
+    # exit through the finally blocks of the search on terminate, so that its statistics are stopped
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    start_time = time.perf_counter()
+    algo = None
+    solutions: List[List[Action]] = []
+    try:
+        algo = config.build(problem)
+        solutions = algo.search()
+        result = {"status": "solved" if solutions else "failed"}
+    except SystemExit:
+        result = {"status": "cancelled"}
+    except Exception as error:
+        result = {"status": "error", "error": repr(error)}
+    # a late terminate must not cut the message short
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    result["elapsed_time"] = time.perf_counter() - start_time
+    if result["status"] != "error":
+        result["length"] = len(solutions[0]) if solutions else None
+        result["nodes"] = len(algo.nodes) if getattr(algo, "nodes", None) is not None else None
+        result["stats"] = algo.stats.to_dict() if algo is not None else None
+    sender.send((solutions, result))
+
+def _receive(receiver: Connection, process: Process) -> Tuple[List[List[Action]], Dict|None]:
+    """Receive the solutions and result of a worker and wait for it to exit, the result being None if it sent none."""
+    try:
+        message = receiver.recv()
+    except EOFError:
+        message = ([], None)
+    receiver.close()
+    process.join()
+    return message
@@ -0,0 +1,77 @@
+import time
+import inspect
+from types import MethodType
+from typing import Any, Callable, Dict, List
+
+_enabled = False
+_records: Dict[str, List[float]] = {} # calls and total time by probe name
+
+class Probe:
+    """
+    Counts the calls of a function and the time spent in them under a probe name.
+
+    A probe set on a class binds to the instances like the function it wraps.
+
+    Args:
+        name (str): The name of the probe in the report.
+        func (Callable): The function or bound method to count.
+    """
+    def __init__(self, name: str, func: Callable) -> None:
+        self.name = name
+        self.func = func
+
+    def __call__(self, *args, **kwargs) -> Any:
+        start_time = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            record = _records.setdefault(self.name, [0, 0.0])
+            record[0] += 1
+            record[1] += time.perf_counter() - start_time
+
+    def __get__(self, obj, objtype=None):
+        return self if obj is None else MethodType(self, obj)
+
+def enable() -> None:
+    """Enable the probes of the objects instrumented from now on."""
+    global _enabled
+    _enabled = True
+
+def enabled() -> bool:
+    return _enabled
+
+def instrument(owner: Any, attr: str, name: str) -> None:
+    """
+    Replace a method of an object or a class with a probe if profiling is enabled.
+
+    Objects call this when they are constructed, so when profiling is disabled their methods are
+    left as they are and the probes cost nothing.
+
+    Args:
+        owner (Any): The object or class whose method is counted.
+        attr (str): The name of the method.
+        name (str): The name of the probe in the report.
+    """
+    if not _enabled or isinstance(inspect.getattr_static(owner, attr), Probe):
+        return
+    setattr(owner, attr, Probe(name, getattr(owner, attr)))
+
+def report() -> Dict[str, Dict[str, float]]:
+    """
+    Return the calls, the total time and the mean time in seconds of each probe.
+
+    The times of a probe include those of the probes called inside it. The calls are counted in
+    the process that makes them, so worker processes send their reports back to be merged.
+    """
+    return {name: {"calls": calls, "total_time": total_time, "mean_time": total_time / calls if calls else 0.0}
+            for name, (calls, total_time) in sorted(_records.items())}
+
+def merge(other: Dict[str, Dict[str, float]]) -> None:
+    """Add the counts of a report from another process."""
+    for name, values in other.items():
+        record = _records.setdefault(name, [0, 0.0])
+        record[0] += values["calls"]
+        record[1] += values["total_time"]
+
+def reset() -> None:
+    _records.clear()
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Generator
+from copy import copy
+from typing import Dict, List, Generator, Hashable, Iterable
 from enum import Enum, auto
 
 class State(ABC):
@@ -39,6 +40,14 @@ class SearchProblem(ABC):
         result(self, state: State, action: Action) -> State: Return the state that results from executing a given action in the given state.
         is_goal(self, state: State) -> bool: Check if the given state is a goal state.
         action_cost(self, s: State, action: Action) -> int|float: Return the cost of taking action from state to another state.
+        
+    Methods(may be realized in subclasses):
+        encode(self, state: State) -> Hashable: Return a compact key of the given state.
+        decode(self, key: Hashable) -> State: Return the state of the given compact key.
+        canonical(self, key: Hashable) -> Hashable: Return the representative of the symmetry class of a compact key.
+        counters(self) -> Dict[str, int]: Return the running counters of the problem, such as cache hits.
+        cache_size(self) -> int: Return the approximate memory used by the caches of the problem.
+        clear_caches(self) -> None: Empty the caches of the problem to free memory.
     """
     
     @abstractmethod
@@ -67,6 +76,40 @@ class SearchProblem(ABC):
         """Return the cost of taking action from state to another state."""
         return 1
     
+    def encode(self, state: State) -> Hashable:
+        """Return a compact key of the given state, the state itself by default."""
+        return state
+    
+    def decode(self, key: Hashable) -> State:
+        """Return the state of the given compact key, the inverse of encode."""
+        return key
+    
+    def canonical(self, key: Hashable) -> Hashable:
+        """
+        Return the representative of the symmetry class of a compact key, the key itself by default.
+
+        Symmetric states must have the same actions up to the symmetry, goal test and heuristic, so that
+        a search can keep one node per class. The paths found are mapped back by replaying them.
+        """
+        return key
+    
+    def counters(self) -> Dict[str, int]:
+        """
+        Return the running counters of the problem, none by default.
+
+        The counters named like the fields of SearchStats (cache_hits, cache_misses, deadlocks) are
+        added to the statistics of the searches over the problem.
+        """
+        return {}
+    
+    def cache_size(self) -> int:
+        """Return the approximate memory used by the caches of the problem in bytes, none by default."""
+        return 0
+    
+    def clear_caches(self) -> None:
+        """Empty the caches of the problem to free memory, when a search runs over its memory budget."""
+        pass
+    
 class HeuristicSearchProblem(SearchProblem):
     '''
     A class representing a heuristic search problem.
@@ -99,9 +142,10 @@ class BiSearchProblem(SearchProblem):
         action_cost(self, s: State, action: Action) -> int|float: Return the cost of taking action from state to another state.
         heuristic(state: State) -> float: Returns the heuristic value of the given state.
         b_heuristic(state: State) -> float: Returns the backward heuristic value of the given state.
+        rooted_at(state: State) -> BiSearchProblem: Return the problem solved from another initial state.
     """
     @abstractmethod
-    def goal_states(self, state: State) -> List[State]:
+    def goal_states(self) -> Iterable[State]:
         pass
     
     @abstractmethod
@@ -116,6 +160,17 @@ class BiSearchProblem(SearchProblem):
     def re_heuristic(self, state: State) -> int|float:
         pass
     
+    def rooted_at(self, state: State) -> "BiSearchProblem":
+        """
+        Return the problem solved from another initial state.
+
+        The copy only replaces the initial state, so problems whose backward heuristic depends on
+        their initial state override this to rebuild it.
+        """
+        problem = copy(self)
+        problem.initial_state = lambda: state
+        return problem
+    
 class GameState(ABC):
     @abstractmethod
     def __init__(self, state: State, player: Enum) -> None:
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import List
 
 from .problem import SearchProblem, Action
+from .stats import SearchStats
 
 class Search(ABC):
     @abstractmethod
@@ -10,4 +11,11 @@ class Search(ABC):
     
     @abstractmethod
     def search(self) -> List[List[Action]]:
-        pass
\ No newline at end of file
+        pass
+    
+    @property
+    def stats(self) -> SearchStats:
+        """The statistics of the search, created on first use since not every search calls __init__."""
+        if "_stats" not in self.__dict__:
+            self._stats = SearchStats()
+        return self._stats
\ No newline at end of file
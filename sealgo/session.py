@@ -0,0 +1,128 @@
+from copy import copy
+from typing import Callable, Dict, Hashable, List, Tuple, Type
+
+from .problem import BiSearchProblem, Action, State
+from .best_first_search import BestFirstSearch
+from .bidirectional import BiDirectional
+from .observer import SampleChannel
+
+class SolverSession:
+    """
+    Answers repeated queries on one problem from different states, reusing the earlier searches.
+
+    The first query runs a bidirectional search on the problem rooted at the queried state (see
+    BiSearchProblem.rooted_at), whose backward search leaves a tree of states with known paths to a
+    goal. Every solution returned also gives a known path to a goal from each state along it. A later
+    query from a state with a known path is answered at once, and otherwise by a forward search that
+    stops at the first state with a known path and joins the two.
+
+    Args:
+        problem (BiSearchProblem): The bidirectional search problem.
+        f_algo (Type[BestFirstSearch]): The forward search algorithm.
+        b_algo (Type[BestFirstSearch]|None, optional): The backward search algorithm of the first query. Defaults to None.
+        b_weight (int|None, optional): The backward scheduling of the first query (see BiDirectional). Defaults to None.
+        *args: Additional arguments to be passed to the search algorithms.
+        **kwargs: Additional keyword arguments to be passed to the search algorithms.
+
+    Attributes:
+        bidirectional (BiDirectional|None): The search of the first query, None before it.
+        paths (Dict[Hashable, Tuple[List[Action], int]]): The solutions returned and the offset in them by state key.
+
+    Methods:
+        solve(state: State) -> List[List[Action]]: Returns a path from a state to a goal.
+        report(callback: Callable, every: int) -> None: Calls a function with the progress of the searches periodically.
+        observe(channel: SampleChannel) -> None: Publishes samples of the expanded states to a channel.
+    """
+    def __init__(self, problem: BiSearchProblem, f_algo: Type[BestFirstSearch], b_algo: Type[BestFirstSearch]|None = None,
+                 b_weight: int|None = None, *args, **kwargs) -> None:
+        self.problem = problem
+        self.f_algo = f_algo
+        self.b_algo = b_algo
+        self.b_weight = b_weight
+        self.args = args
+        self.kwargs = kwargs
+        self.bidirectional: BiDirectional|None = None
+        self.paths: Dict[Hashable, Tuple[List[Action], int]] = {}
+        self.report_callback: Callable[[Dict[str, float]], None]|None = None
+        self.report_every = 0
+        self.observer: SampleChannel|None = None
+
+    def report(self, callback: Callable[[Dict[str, float]], None], every: int = 1000) -> None:
+        """
+        Call a function with the progress of the searches of the next queries periodically (see BestFirstSearch.report).
+
+        Args:
+            callback (Callable[[Dict[str, float]], None]): The function to call with the progress.
+            every (int, optional): The number of expansions between calls. Defaults to 1000.
+        """
+        self.report_callback = callback
+        self.report_every = every
+
+    def observe(self, channel: SampleChannel) -> None:
+        """
+        Publish samples of the states expanded by the searches of the next queries to a channel (see BestFirstSearch.observe).
+
+        Args:
+            channel (SampleChannel): The channel of the samples.
+        """
+        self.observer = channel
+
+    def solve(self, state: State) -> List[List[Action]]:
+        """
+        Find a path from a state to a goal.
+
+        Args:
+            state (State): The state to solve from.
+
+        Returns:
+            List[List[Action]]: The path from the state to a goal, or no path if there is none.
+        """
+        if self.bidirectional is None:
+            self.bidirectional = BiDirectional(self.problem.rooted_at(state), self.f_algo, self.b_algo, self.b_weight, *self.args, **self.kwargs)
+            self._attach(self.bidirectional)
+            solutions = self.bidirectional.search()
+            if solutions:
+                self._record(state, solutions[0])
+        key = self.problem.encode(state)
+        if self._known(key):
+            return [self._suffix(key)]
+        # search forward to the nearest state with a known path
+        f_problem = copy(self.problem)
+        f_problem.initial_state = lambda: state
+        f_problem.is_goal = lambda s: self.problem.is_goal(s) or self._known(self.problem.encode(s))
+        algo = self.f_algo(f_problem, *self.args, **self.kwargs)
+        self._attach(algo)
+        solutions = algo.search()
+        if not solutions:
+            return []
+        end = state
+        for action in solutions[0]:
+            end = self.problem.result(end, action)
+        end_key = self.problem.encode(end)
+        solution = solutions[0] + (self._suffix(end_key) if self._known(end_key) else [])
+        self._record(state, solution)
+        return [solution]
+
+    def _attach(self, algo: BestFirstSearch|BiDirectional) -> None:
+        """Pass the progress callback and the observer channel on to a search."""
+        if self.report_callback is not None:
+            algo.report(self.report_callback, self.report_every)
+        if self.observer is not None:
+            algo.observe(self.observer)
+
+    def _known(self, key: Hashable) -> bool:
+        """Return whether a state has a known path to a goal."""
+        return key in self.paths or key in self.bidirectional.b_algo.nodes
+
+    def _suffix(self, key: Hashable) -> List[Action]:
+        """Return the known path from a state to a goal."""
+        if key in self.paths:
+            solution, offset = self.paths[key]
+            return solution[offset:]
+        return self.bidirectional._path_to_goal(key)
+
+    def _record(self, state: State, solution: List[Action]) -> None:
+        """Record the path to a goal from every state along a solution."""
+        for offset, action in enumerate(solution):
+            self.paths.setdefault(self.problem.encode(state), (solution, offset))
+            state = self.problem.result(state, action)
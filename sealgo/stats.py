@@ -0,0 +1,96 @@
+import json
+import time
+import resource
+from typing import Dict, Iterable, List
+
+from .problem import SearchProblem
+
+_counts = ("generated", "expanded", "duplicates", "heuristic_calls", "heuristic_time",
+           "cache_hits", "cache_misses", "deadlocks", "elapsed_time")
+_peaks = ("peak_frontier", "peak_memory", "peak_memory_estimate")
+
+class SearchStats:
+    """
+    Statistics of a search, serializable to JSON.
+
+    The counters of the problem (see SearchProblem.counters) are counted from start to stop, so
+    the caches and deadlock checks of the problem are attributed to the search that ran them.
+
+    Attributes:
+        generated (int): The number of successor states generated.
+        expanded (int): The number of states expanded.
+        duplicates (int): The number of generated states with a known path at least as cheap.
+        peak_frontier (int): The largest size of the frontier.
+        heuristic_calls (int): The number of heuristic evaluations.
+        heuristic_time (float): The time spent in heuristic evaluations in seconds.
+        cache_hits (int): The number of hits of the caches of the problem.
+        cache_misses (int): The number of misses of the caches of the problem.
+        deadlocks (int): The number of states the problem found in a deadlock.
+        peak_memory (int): The peak resident memory of the process in bytes.
+        peak_memory_estimate (int): The largest estimate of the memory of the nodes, frontier and problem
+            caches of the search in bytes (see BestFirstSearch.memory), sampled at the end and under a budget.
+        elapsed_time (float): The time spent searching in seconds.
+
+    Methods:
+        start(problems: List[SearchProblem]) -> None: Starts timing a search and counting the counters of its problems.
+        stop(problems: List[SearchProblem]) -> None: Stops timing and counting, adding to the statistics.
+        merge(other: SearchStats) -> SearchStats: Adds the counts of other statistics, keeping the larger peaks.
+        aggregate(stats: Iterable[SearchStats]) -> SearchStats: Merges statistics into new ones.
+        to_dict() -> Dict[str, float]: Returns the statistics with the cache hit rate.
+        to_json() -> str: Returns the statistics as JSON.
+        from_dict(values: Dict[str, float]) -> SearchStats: Creates statistics from a dictionary made by to_dict.
+    """
+    def __init__(self) -> None:
+        for name in _counts + _peaks:
+            setattr(self, name, 0)
+        self._start_time = 0.0
+        self._start_counters: List[Dict[str, int]] = []
+
+    def start(self, problems: List[SearchProblem]) -> None:
+        self._start_time = time.perf_counter()
+        self._start_counters = [problem.counters() for problem in problems]
+
+    def stop(self, problems: List[SearchProblem]) -> None:
+        self.elapsed_time += time.perf_counter() - self._start_time
+        for problem, start in zip(problems, self._start_counters):
+            for name, value in problem.counters().items():
+                setattr(self, name, getattr(self, name) + value - start.get(name, 0))
+        # ru_maxrss is in kilobytes on Linux
+        self.peak_memory = max(self.peak_memory, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+    def merge(self, other: "SearchStats") -> "SearchStats":
+        for name in _counts:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in _peaks:
+            setattr(self, name, max(getattr(self, name), getattr(other, name)))
+        return self
+
+    @classmethod
+    def aggregate(cls, stats: Iterable["SearchStats"]) -> "SearchStats":
+        total = cls()
+        for other in stats:
+            total.merge(other)
+        return total
+
+    @property
+    def cache_hit_rate(self) -> float|None:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    def to_dict(self) -> Dict[str, float]:
+        values = {name: getattr(self, name) for name in _counts + _peaks}
+        values["cache_hit_rate"] = self.cache_hit_rate
+        return values
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, float]) -> "SearchStats":
+        stats = cls()
+        for name in _counts + _peaks:
+            setattr(stats, name, values.get(name, 0))
+        return stats
+
+    def __repr__(self) -> str:
+        return f"SearchStats({', '.join(f'{name}={value}' for name, value in self.to_dict().items())})"
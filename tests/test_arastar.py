@@ -0,0 +1,37 @@
+from copy import copy
+
+from game.map import Map
+from game.problem import SokobanProblem
+from game.solver_process import AnytimeSolver
+from sealgo.best_first_search import ARAStar
+from sealgo.problem import Action
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def test_arastar_improves():
+    problem = SokobanProblem(Map("levels/level3.txt"))
+    solutions = list(ARAStar(problem, weight=5, step=1, time_limit=60).solutions())
+    assert len(solutions) > 1
+    for solution, _ in solutions:
+        assert _solves(problem, solution)
+    lengths = [len(solution) for solution, _ in solutions]
+    bounds = [bound for _, bound in solutions]
+    assert lengths == sorted(lengths, reverse=True)
+    assert bounds == sorted(bounds, reverse=True) and bounds[-1] >= 1
+
+def test_anytime_solver_reports_improvements():
+    level = Map("levels/level3.txt")
+    progress = []
+    solver = AnytimeSolver(60, weight=5)
+    solver.report(progress.append)
+    solutions = solver.solve(level)
+    assert solutions and _solves(SokobanProblem(level), solutions[0])
+    assert progress and progress[-1]["length"] == len(solutions[0])
@@ -0,0 +1,27 @@
+import json
+
+from game.batch import run_batch
+from sealgo.best_first_search import AStar
+from sealgo.portfolio import SolverConfig
+
+CONFIGS = [SolverConfig("forward", AStar, weight=3)]
+
+def _lines(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+def test_rerun_skips_completed_jobs(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    results = run_batch([1], CONFIGS, output, workers=1)
+    assert [result["status"] for result in results] == ["solved"]
+    assert run_batch([1], CONFIGS, output, workers=1) == []
+    assert len(_lines(output)) == 1
+
+def test_resume_reruns_unfinished_jobs(tmp_path):
+    output = tmp_path / "results.jsonl"
+    # a job that ran out of time, then a line cut short by a kill
+    output.write_text(json.dumps({"level": 1, "config": "forward", "status": "timeout", "elapsed_time": 1.0})
+                      + "\n" + '{"level": 2, "con')
+    results = run_batch([1], CONFIGS, str(output), workers=1)
+    assert [(result["level"], result["status"]) for result in results] == [(1, "solved")]
+    assert run_batch([1], CONFIGS, str(output), workers=1) == []
@@ -0,0 +1,24 @@
+from copy import copy
+
+from game.map import Map
+from game.problem import SokobanProblem
+from sealgo.beam_search import BeamSearch
+from sealgo.best_first_search import AStar
+from sealgo.problem import Action
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def test_beam_path():
+    problem = SokobanProblem(Map("levels/level1.txt"))
+    solutions = BeamSearch(problem, width=100).search()
+    assert solutions and _solves(problem, solutions[0])
+    # the same shape as the paths of the best-first searches
+    assert solutions[0][0] == AStar(problem, weight=3).search()[0][0] == Action.STAY
@@ -0,0 +1,33 @@
+from copy import copy
+
+from game.map import Map
+from game.problem import SokobanProblem
+from sealgo.best_first_search import AStar
+from sealgo.bitstate import BitstateStore
+from sealgo.problem import Action
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def test_bitstate_path():
+    problem = SokobanProblem(Map("levels/level1.txt"))
+    search = AStar(problem, weight=3)
+    search.reset(BitstateStore(problem, bits=2**20, anchor_interval=4))
+    solutions = search.search()
+    assert solutions and _solves(problem, solutions[0])
+
+def test_bitstate_symmetric_path():
+    problem = SokobanProblem(Map("levels/level1.txt"), symmetry=True)
+    assert len(problem.permutations) > 1
+    search = AStar(problem, weight=3)
+    search.reset(BitstateStore(problem, bits=2**20, anchor_interval=4))
+    solutions = search.search()
+    assert search._symmetric
+    assert solutions and _solves(problem, solutions[0])
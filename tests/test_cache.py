@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+from game import analysis
+from game.analysis import LevelTables
+from game import cache as cache_module
+from game.cache import LevelCache
+from game.map import Map
+
+def test_warm_load_skips_precomputation(tmp_path, monkeypatch):
+    cache = LevelCache(str(tmp_path))
+    level = Map("levels/level1.txt")
+    cold = LevelTables.compute(level, cache)
+    def fail(*args):
+        raise AssertionError("the tables should come from the cache")
+    for name in ("pull_distances", "push_distances", "walk_distances", "freeze_patterns"):
+        monkeypatch.setattr(analysis, name, fail)
+    warm = LevelTables.compute(level, cache)
+    for name in ("dead", "patterns", "pull", "walk"):
+        assert np.array_equal(getattr(cold, name), getattr(warm, name))
+
+def _arrays(seed: int):
+    # random, so that every file has about the same compressed size
+    return {"table": np.random.default_rng(seed).integers(0, 2**16, size=4096, dtype=np.uint16)}
+
+def test_version_mismatch_invalidates(tmp_path, monkeypatch):
+    cache = LevelCache(str(tmp_path))
+    cache.store("level", _arrays(0))
+    assert cache.load("level") is not None
+    monkeypatch.setattr(cache_module, "CACHE_VERSION", cache_module.CACHE_VERSION + 1)
+    assert cache.load("level") is None
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LevelCache(str(tmp_path))
+    cache.store("a", _arrays(0))
+    cache.store("b", _arrays(1))
+    # room for two files, with "a" used after "b"
+    cache.max_bytes = 2 * os.path.getsize(tmp_path / "a.npz") + 1024
+    os.utime(tmp_path / "a.npz", (1, 1))
+    os.utime(tmp_path / "b.npz", (2, 2))
+    assert cache.load("a") is not None
+    cache.store("c", _arrays(2))
+    assert sorted(os.listdir(tmp_path)) == ["a.npz", "c.npz"]
+    assert cache.load("b") is None
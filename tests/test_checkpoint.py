@@ -0,0 +1,40 @@
+from copy import copy
+
+import pytest
+
+from game.map import Map
+from game.problem import SokobanProblem
+from sealgo.best_first_search import AStar
+from sealgo.problem import Action
+
+class _Interrupted(Exception):
+    pass
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def _interrupt(progress):
+    raise _Interrupted()
+
+def test_resume_from_checkpoint(tmp_path):
+    path = str(tmp_path / "search.npz")
+    problem = SokobanProblem(Map("levels/level1.txt"))
+    search = AStar(problem, weight=3)
+    search.checkpoint(path, every=10)
+    search.report(_interrupt, every=25)
+    with pytest.raises(_Interrupted):
+        search.search()
+    resumed = AStar(problem, weight=3)
+    resumed.checkpoint(path, every=10)
+    # from the last snapshot before the interruption
+    assert resumed.expanded == 20
+    solutions = resumed.search()
+    assert solutions and _solves(problem, solutions[0])
+    assert len(solutions[0]) == len(AStar(problem, weight=3).search()[0])
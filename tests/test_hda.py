@@ -0,0 +1,48 @@
+import os
+import signal
+from copy import copy
+
+import pytest
+
+from game.map import Map
+from game.problem import SokobanProblem
+from sealgo.hda import HDAStar
+from sealgo.problem import Action
+
+class _FailingProblem(SokobanProblem):
+    """Raises in the heuristic of the first state a worker expands past the initial one."""
+    def heuristic(self, state):
+        if state.player_x != self.level.player_x or state.player_y != self.level.player_y:
+            raise ValueError("heuristic failed")
+        return super().heuristic(state)
+
+class _DyingProblem(SokobanProblem):
+    """Kills the worker process that evaluates a state past the initial one."""
+    def heuristic(self, state):
+        if state.player_x != self.level.player_x or state.player_y != self.level.player_y:
+            os.kill(os.getpid(), signal.SIGKILL)
+        return super().heuristic(state)
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_hda_path(workers):
+    problem = SokobanProblem(Map("levels/level1.txt"))
+    search = HDAStar(problem, weight=3, workers=workers)
+    solutions = search.search()
+    assert solutions and _solves(problem, solutions[0])
+    assert len(search.expanded) == workers and sum(search.expanded) > 0
+
+@pytest.mark.parametrize("problem_class, message", [(_FailingProblem, "heuristic failed"), (_DyingProblem, "exited")])
+def test_hda_worker_failure(problem_class, message):
+    search = HDAStar(problem_class(Map("levels/level1.txt")), workers=2)
+    with pytest.raises(RuntimeError, match=message):
+        search.search()
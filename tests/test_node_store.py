@@ -0,0 +1,82 @@
+import numpy as np
+
+from game.problem import SokobanAction
+from sealgo.node_store import NodeStore, BiNodeStore
+from sealgo.problem import Action
+
+def _chain() -> NodeStore:
+    store = NodeStore()
+    root = store.add(b"a", NodeStore.ROOT, Action.STAY, 0)
+    left = store.add(b"b", root, SokobanAction.LEFT, 1)
+    store.add(b"c", left, SokobanAction.RIGHT, 2)
+    return store
+
+def test_dense_ids_and_round_trips():
+    store = _chain()
+    assert [store.get(key) for key in (b"a", b"b", b"c")] == [0, 1, 2]
+    assert len(store) == 3 and b"b" in store and store.get(b"d") is None
+    assert list(store.parents) == [NodeStore.ROOT, 0, 1]
+    assert list(store.g) == [0, 1, 2]
+    assert [store.action(node) for node in range(3)] == [Action.STAY, SokobanAction.LEFT, SokobanAction.RIGHT]
+    assert store.path(2) == [Action.STAY, SokobanAction.LEFT, SokobanAction.RIGHT]
+
+def test_relax_keeps_cheaper_paths():
+    store = _chain()
+    assert store.relax(b"c", 1, SokobanAction.LEFT, 5) is None
+    assert store.relax(b"c", 0, SokobanAction.LEFT, 1) == 2
+    assert store.parents[2] == 0 and store.g[2] == 1 and store.action(2) == SokobanAction.LEFT
+    assert store.relax(b"d", 2, SokobanAction.RIGHT, 2) == 3
+    assert store.path(3) == [Action.STAY, SokobanAction.LEFT, SokobanAction.RIGHT]
+
+def test_snapshot_restore():
+    store = _chain()
+    restored = NodeStore.restore({name: np.copy(array) for name, array in store.snapshot().items()})
+    assert restored.keys == store.keys and restored.index == store.index
+    assert list(restored.parents) == list(store.parents)
+    assert list(restored.g) == list(store.g)
+    assert restored.path(2) == store.path(2)
+    # the action codes go on where they stopped
+    assert restored.add(b"d", 2, SokobanAction.LEFT, 3) == 3 and restored.action(3) == SokobanAction.LEFT
+
+def _meeting() -> BiNodeStore:
+    store = BiNodeStore()
+    forward, backward = store.view(BiNodeStore.FORWARD), store.view(BiNodeStore.BACKWARD)
+    start = forward.add(b"s", NodeStore.ROOT, Action.STAY, 0)
+    middle = forward.add(b"m", start, SokobanAction.LEFT, 1)
+    goal = backward.add(b"g", NodeStore.ROOT, Action.STAY, 0)
+    assert store.best_key is None
+    # the second direction reaches a key of the first
+    assert backward.relax(b"m", goal, SokobanAction.RIGHT, 4) == middle
+    return store
+
+def test_views_share_ids():
+    store = _meeting()
+    forward, backward = store.views
+    assert len(store) == 3 and len(forward) == 2 and len(backward) == 2
+    assert forward.get(b"g") is None and b"g" in backward
+    assert forward.get(b"m") == backward.get(b"m") == 1
+    assert forward.g[1] == 1 and backward.g[1] == 4
+    assert forward.path(1) == [Action.STAY, SokobanAction.LEFT]
+    assert backward.path(1) == [Action.STAY, SokobanAction.RIGHT]
+
+def test_meeting_keeps_cheapest():
+    store = _meeting()
+    assert store.best_key == b"m" and store.best_cost == 5
+    _, backward = store.views
+    backward.relax(b"m", 2, SokobanAction.RIGHT, 2)
+    assert store.best_cost == 3
+    backward.relax(b"m", 2, SokobanAction.RIGHT, 6)
+    assert store.best_cost == 3
+
+def test_bi_snapshot_restore():
+    store = _meeting()
+    restored = BiNodeStore.restore({name: np.copy(array) for name, array in store.snapshot().items()})
+    assert restored.keys == store.keys and restored.directions == store.directions
+    assert restored.best_key == b"m" and restored.best_cost == 5
+    for view, restored_view in zip(store.views, restored.views):
+        assert len(restored_view) == len(view)
+        assert list(restored_view.g) == list(view.g)
+        assert restored_view.path(1) == view.path(1)
+    # a restored view goes on meeting the other direction
+    restored.view(BiNodeStore.FORWARD).relax(b"g", 1, SokobanAction.RIGHT, 2)
+    assert restored.best_key == b"g" and restored.best_cost == 2
@@ -0,0 +1,51 @@
+from copy import copy
+
+from game.map import Map
+from game.biproblem import BiSokobanProblem
+from sealgo.best_first_search import AStar
+from sealgo.problem import Action
+from sealgo.session import SolverSession
+
+def _moved(problem: BiSokobanProblem, moves: int) -> Map:
+    state = copy(problem.level)
+    for _ in range(moves):
+        state = problem.result(state, problem.actions(state)[0])
+    return state
+
+def _solves(problem: BiSokobanProblem, state: Map, path) -> bool:
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def test_first_query_from_moved_state():
+    problem = BiSokobanProblem(Map("levels/level2.txt"))
+    state = _moved(problem, 3)
+    session = SolverSession(problem, AStar, weight=3)
+    solutions = session.solve(state)
+    # the bidirectional search starts from the queried state, not from the level
+    bidirectional = session.bidirectional
+    assert problem.encode(bidirectional.f_problem.initial_state()) == problem.encode(state)
+    # and its backward heuristic leads back to that state
+    assert bidirectional.b_problem.heuristic(state) == 0
+    assert problem.re_heuristic(state) > 0
+    assert solutions and _solves(problem, state, solutions[0])
+
+def test_query_on_known_path():
+    problem = BiSokobanProblem(Map("levels/level2.txt"))
+    state = _moved(problem, 3)
+    session = SolverSession(problem, AStar, weight=3)
+    solution = session.solve(state)[0]
+    moves = [action for action in solution if action != Action.STAY]
+    on_path = state
+    for action in moves[:5]:
+        on_path = problem.result(on_path, action)
+    def no_search(*args, **kwargs):
+        raise AssertionError("a state on a known path should be answered without a search")
+    session.f_algo = no_search
+    suffix = session.solve(on_path)
+    assert suffix and [action for action in suffix[0] if action != Action.STAY] == moves[5:]
+    assert _solves(problem, on_path, suffix[0])
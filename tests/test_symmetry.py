@@ -0,0 +1,57 @@
+from copy import copy
+
+import numpy as np
+import pytest
+
+from game.map import Map
+from game.problem import SokobanProblem
+from sealgo.best_first_search import AStar
+from sealgo.problem import Action
+
+def _solves(problem: SokobanProblem, path) -> bool:
+    state = copy(problem.level)
+    for action in path:
+        if action == Action.STAY:
+            continue
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return problem.is_goal(state)
+
+def _walk(problem: SokobanProblem, moves: int, seed: int):
+    rng = np.random.default_rng(seed)
+    state = copy(problem.level)
+    for _ in range(moves):
+        actions = problem.actions(state)
+        if not actions:
+            break
+        state = problem.result(state, actions[rng.integers(len(actions))])
+        yield state
+
+def test_canonical_key_is_invariant():
+    problem = SokobanProblem(Map("levels/level16.txt"), symmetry=True)
+    assert len(problem.permutations) == 8
+    for state in _walk(problem, 50, seed=0):
+        key = state.pack()
+        canonical = problem.canonical(key)
+        for permutation in problem.permutations:
+            # the key of the symmetric state, boxes sorted as Map.pack does
+            cells = permutation[np.frombuffer(key, dtype=np.uint16)]
+            cells[1:].sort()
+            assert problem.canonical(cells.tobytes()) == canonical
+
+@pytest.mark.parametrize("level", ["levels/level1.txt", "levels/level2.txt"])
+def test_symmetric_path_reaches_goal(level):
+    problem = SokobanProblem(Map(level), symmetry=True)
+    assert len(problem.permutations) > 1
+    search = AStar(problem, weight=3)
+    solutions = search.search()
+    assert search._symmetric
+    assert solutions and _solves(problem, solutions[0])
+
+def test_symmetric_search_keeps_optimal_length():
+    level = Map("levels/level1.txt")
+    plain = AStar(SokobanProblem(level)).search()
+    symmetric = AStar(SokobanProblem(level, symmetry=True)).search()
+    assert plain and symmetric
+    assert len(symmetric[0]) == len(plain[0])
@@ -0,0 +1,38 @@
+from copy import copy
+
+import numpy as np
+
+from game.problem import SokobanProblem, SokobanAction, _action_dirs
+from game.vec_env import VecSokobanEnv, load_pack, encode
+
+def test_vec_env_matches_p_move():
+    levels = load_pack()
+    problems = [SokobanProblem(level) for level in levels]
+    env = VecSokobanEnv(levels, 16, max_steps=50, seed=0)
+    maps = [env.to_map(i) for i in range(env.num_envs)]
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        actions = rng.integers(len(SokobanAction), size=env.num_envs)
+        level_ids = env.level_ids.copy()
+        obs, _, done, solved = env.step(actions)
+        for i, map in enumerate(maps):
+            action = list(SokobanAction)[actions[i]]
+            if action in problems[level_ids[i]].actions(map):
+                map = copy(map).p_move(*_action_dirs[action])
+            if done[i]:
+                assert solved[i] == map.is_all_boxes_in_place()
+                maps[i] = env.to_map(i)
+                continue
+            assert not map.is_all_boxes_in_place()
+            height, width = map.scale
+            assert np.array_equal(encode(map), obs[i, :height, :width])
+            assert (map.player_x, map.player_y) == tuple(env.players[i])
+            maps[i] = map
+
+def test_observations_are_not_aliased():
+    env = VecSokobanEnv(load_pack(), 4, seed=0)
+    first = env.reset()
+    kept = first.copy()
+    obs, _, _, _ = env.step(np.zeros(env.num_envs, dtype=np.int64))
+    assert obs is not env.obs and first is not env.obs
+    assert np.array_equal(first, kept)
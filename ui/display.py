@@ -16,6 +16,7 @@ class State(Enum):
     GAMING = auto()
     GENERATING = auto()
     SOLVING = auto()
+    REPLAYING = auto()
     
 class Display:
     """
@@ -32,6 +33,7 @@ class Display:
         icon_paths (str): The paths to the icons used for different tiles in the game.
         images (dict): A dictionary mapping tiles to their corresponding images.
         tile_size (int): The size of each tile in pixels.
+        progress (Dict[str, float]): The progress of the AI search shown while solving.
 
     Methods:
         _load_images: Load the images for the tiles.
@@ -49,6 +51,7 @@ class Display:
         self.scale = scale
         self.screen = pygame.display.set_mode(self.scale)
         self.state = State.START_MENU
+        self.progress = {}
         self._load_images(icon_paths)
         pygame.display.set_caption("Sokoban")
 
@@ -169,11 +172,22 @@ class Display:
     
     def _ai_solving(self) -> Tuple[Dict[pygame.Surface, pygame.Rect], Dict[pygame.Surface, Event]]:
         solving_text = TITLE_FONT.render("AI Solving...", True, (255, 255, 255))
+        progress_text = BUTTON_FONT.render(
+            f"Expanded {self.progress.get('expanded', 0)}    Frontier {self.progress.get('frontier', 0)}"
+            f"    Best h {self.progress.get('best_h', '-')}"
+            + (f"    Length {self.progress['length']} (bound {self.progress['bound']})" if 'length' in self.progress else ""),
+            True, (255, 255, 255))
+        cancel_text = BUTTON_FONT.render("Cancel", True, (255, 255, 255))
+        text_event = {
+            cancel_text: Event.PAUSE,
+        }
         text_pos = {
-            solving_text: (0.5, 0.5)
+            solving_text: (0.5, 0.4),
+            progress_text: (0.5, 0.5),
+            cancel_text: (0.5, 0.6),
         }
         text_rect = self._show(text_pos)
-        return text_rect, {}
+        return text_rect, text_event
                     
     def run(self, map: map, lvl_num: int) \
             -> Tuple[Dict[pygame.Surface, pygame.Rect], Dict[pygame.Surface, Event]]:
@@ -193,7 +207,7 @@ class Display:
         """
         
         match self.state:
-            case State.GAMING:
+            case State.GAMING | State.REPLAYING:
                 return self.render(map)
             case State.MAIN_MENU:
                 return self._main_menu(lvl_num)
@@ -0,0 +1,105 @@
+import pygame
+import numpy as np
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from typing import Dict, List
+from sealgo.observer import SampleChannel
+from .display import Display, Point2D, BUTTON_FONT
+
+class Visualizer(Display):
+    """
+    Draws the states sampled from a search over a heat map of how often each cell held a box.
+
+    Args:
+        icon_paths (Dict): The paths to the icons used for different tiles in the game.
+        floor (Map): The floor map of the level searched (see Map.floor).
+        scale (Point2D, optional): The scale of the window. Defaults to (800, 600).
+
+    Attributes:
+        floor (Map): The floor map of the level searched.
+        heat (np.ndarray): The number of samples with a box on each cell, by cell index.
+        samples (int): The number of samples received.
+
+    Methods:
+        update: Add sampled keys to the heat map.
+        draw: Draw a map over the heat map.
+    """
+
+    def __init__(self, icon_paths: Dict, floor, scale: Point2D = (800, 600)):
+        super().__init__(icon_paths, scale)
+        pygame.display.set_caption("Sokoban Search")
+        self.floor = floor
+        self.heat = np.zeros(floor.tiles.size, dtype=np.int64)
+        self.samples = 0
+
+    def update(self, keys: List[bytes]) -> None:
+        """
+        Add sampled keys to the heat map.
+
+        Args:
+            keys (List[bytes]): The compact keys of the sampled states (see Map.pack).
+        """
+        for key in keys:
+            self.heat[np.frombuffer(key, dtype=np.uint16)[1:]] += 1
+        self.samples += len(keys)
+
+    def draw(self, map) -> None:
+        """
+        Draw a map over the heat map.
+
+        Args:
+            map: The sampled map.
+        """
+        self.tile_size = min(self.scale[0] // map.scale[1], (self.scale[1] - 40) // map.scale[0])
+        self.screen.fill((0, 0, 0))
+        heat = self.heat / max(self.heat.max(), 1)
+        overlay = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
+        for y, row in enumerate(map.tiles):
+            for x, tile in enumerate(row):
+                image = self.images.get(tile)
+                if image:
+                    scaled_image = pygame.transform.scale(image, (self.tile_size, self.tile_size))
+                    self.screen.blit(scaled_image, (x * self.tile_size, y * self.tile_size))
+                share = heat[y * map.scale[1] + x]
+                if share > 0:
+                    overlay.fill((255, 0, 0, int(160 * share)))
+                    self.screen.blit(overlay, (x * self.tile_size, y * self.tile_size))
+        samples_text = BUTTON_FONT.render(f"Samples {self.samples}", True, (255, 255, 255))
+        self.screen.blit(samples_text, (0, self.scale[1] - 40))
+        pygame.display.flip()
+
+def start_visualizer(channel: SampleChannel, floor, icon_paths: Dict) -> BaseProcess:
+    """
+    Start drawing the samples of a channel in a new window.
+
+    The renderer is spawned rather than forked, so that it opens its own window.
+
+    Args:
+        channel (SampleChannel): The channel the search publishes its samples to.
+        floor (Map): The floor map of the level searched.
+        icon_paths (Dict): The paths to the icons used for different tiles in the game.
+
+    Returns:
+        BaseProcess: The renderer process.
+    """
+    process = get_context("spawn").Process(target=_run, args=(channel, floor, icon_paths), daemon=True)
+    process.start()
+    return process
+
+def _run(channel: SampleChannel, floor, icon_paths: Dict) -> None:
+    """Draw the samples of a channel until the window is closed."""
+    visualizer = Visualizer(icon_paths, floor)
+    clock = pygame.time.Clock()
+    map = floor
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                channel.close()
+                pygame.quit()
+                return
+        keys = channel.read()
+        if keys:
+            visualizer.update(keys)
+            map = floor.unpack(keys[-1])
+        visualizer.draw(map)
+        clock.tick(30)
@@ -1,36 +1,82 @@
+import os
 import json
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def json_to_dataframe(json_data):
+def jsonl_to_dataframe(path):
     """
-    将JSON数据转换为DataFrame。
+    将批量求解的JSONL结果文件转换为DataFrame，每行对应一个(关卡, 配置)任务。
+
+    续跑时同一任务可能有多行(例如先超时后求解)，只保留最后一行。
 
     参数:
-        json_data (dict): JSON数据
+        path (str): results.jsonl的路径
 
     返回:
-        pd.DataFrame: 数据Frame
+        pd.DataFrame: 包含config、level、status、elapsed_time、length、nodes和b_factor列的数据Frame
     """
     rows = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError: # 被中断时写了一半的行
+                continue
+            rows.append({
+                'config': result['config'],
+                'level': int(result['level']),
+                'status': result['status'],
+                'elapsed_time': result['elapsed_time'],
+                'length': result.get('length'),
+                'nodes': result.get('nodes'),
+                'b_factor': result.get('b_factor'),
+            })
+    df = pd.DataFrame(rows)
+    return df.drop_duplicates(['level', 'config'], keep='last').reset_index(drop=True)
 
-    for weight, levels in json_data.items():
-        for level, details in levels.items():
-            row = {
-                'weight': 10000 if weight == "Infinity" else float(weight),
-                'level': int(level),
-                'elapsed_time': details['elapsed_time'],
-                'b_factor': details['b_factor'],
-                'length': details['length']
-            }
-            rows.append(row)
+def json_to_dataframe(json_data, config):
+    """
+    将限时(ARA*)或并行组合模式写出的results.json转换为DataFrame。
 
-    df = pd.DataFrame(rows)
-    return df
+    参数:
+        json_data (dict): 以关卡号为键的结果字典
+        config (str): 结果的配置名，组合模式下使用获胜的配置名
+
+    返回:
+        pd.DataFrame: 与jsonl_to_dataframe相同列的数据Frame
+    """
+    rows = []
+    for level, details in json_data.items():
+        rows.append({
+            'config': details.get('winner') or config,
+            'level': int(level),
+            'status': 'failed' if details['length'] is None else 'solved',
+            'elapsed_time': details['elapsed_time'],
+            'length': details['length'],
+            'nodes': None,
+            'b_factor': details.get('b_factor'),
+        })
+    return pd.DataFrame(rows)
+
+def load_results(folder='results'):
+    """
+    读取结果文件夹中的结果，优先读取批量求解的results.jsonl，否则读取results.json。
+
+    参数:
+        folder (str): 结果文件夹
+
+    返回:
+        pd.DataFrame: 数据Frame
+    """
+    path = os.path.join(folder, 'results.jsonl')
+    if os.path.exists(path):
+        return jsonl_to_dataframe(path)
+    with open(os.path.join(folder, 'results.json'), 'r') as f:
+        return json_to_dataframe(json.load(f), 'anytime')
 
 def plot_analysis(df):
     """
-    分析数据并使用matplotlib绘制图表。
+    按配置比较各关卡的解长度和求解时间，并使用matplotlib绘制图表。
 
     参数:
         df (pd.DataFrame): 数据Frame
@@ -38,40 +84,35 @@ def plot_analysis(df):
     返回:
         None
     """
-    levels = df['level'].unique()
-    weights = sorted(df['weight'].unique())
+    solved = df[df['status'] == 'solved']
 
     plt.figure(figsize=(14, 7))
 
-    # 绘制 b_factor 随 b_weight 变化的曲线
+    # 绘制各配置的解长度随关卡变化的曲线
     plt.subplot(1, 2, 1)
-    for level in levels:
-        level_data = df[df['level'] == level]
-        plt.plot(level_data['weight'], level_data['b_factor'], marker='o', label=f'Level {level}')
-    plt.xscale('log')
-    plt.xlabel('b_weight')
-    plt.ylabel('b_factor')
-    plt.title('b_factor vs b_weight')
-    plt.xticks([1, 10, 100, 1000, 10000], ['1', '10', '100', '1000', 'Infinity'])
+    for config, config_data in solved.groupby('config'):
+        config_data = config_data.sort_values('level')
+        plt.plot(config_data['level'], config_data['length'], marker='o', label=config)
+    plt.xlabel('level')
+    plt.ylabel('length')
+    plt.title('length by config')
     plt.legend()
 
-    # 绘制 elapsed_time 随 b_weight 变化的曲线
+    # 绘制各配置的求解时间随关卡变化的曲线
     plt.subplot(1, 2, 2)
-    for level in levels:
-        level_data = df[df['level'] == level]
-        plt.plot(level_data['weight'], level_data['elapsed_time'], marker='o', label=f'Level {level}')
-    plt.xscale('log')
-    plt.xlabel('b_weight')
+    for config, config_data in solved.groupby('config'):
+        config_data = config_data.sort_values('level')
+        plt.plot(config_data['level'], config_data['elapsed_time'], marker='o', label=config)
+    plt.yscale('log')
+    plt.xlabel('level')
     plt.ylabel('elapsed_time')
-    plt.title('elapsed_time vs b_weight')
-    plt.xticks([1, 10, 100, 1000, 10000], ['1', '10', '100', '1000', 'Infinity'])
+    plt.title('elapsed_time by config')
     plt.legend()
 
     plt.tight_layout()
     plt.show()
-    
+
 if __name__ == '__main__':
-    with open('results/results.json', 'r') as f:
-        json_data = json.load(f)
-    df = json_to_dataframe(json_data)
-    plot_analysis(df)
\ No newline at end of file
+    df = load_results()
+    print(df.groupby(['config', 'status']).size())
+    plot_analysis(df)
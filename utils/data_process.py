@@ -1,30 +1,18 @@
 import pandas as pd
-import json
 import os
 
-results_folder = "results"
-
-def json_to_md(input_file: str, output_file:str):
-    rows = []
-    with open(os.path.join(results_folder, input_file), 'r') as f:
-        json_data = json.load(f)
+from data_analysis import load_results
 
-    for weight, levels in json_data.items():
-        for level, details in levels.items():
-            row = {
-                'weight': weight,
-                'level': level,
-                'elapsed_time': f"{details['elapsed_time']:.2f}",
-                'b_factor': f"{details['b_factor']:.2f}",
-                'length': details['length']
-            }
-            rows.append(row)
+results_folder = "results"
 
-    df = pd.DataFrame(rows)
+def json_to_md(output_file:str):
+    df = load_results(results_folder)
+    df['elapsed_time'] = df['elapsed_time'].map(lambda time: f"{time:.2f}")
+    df['b_factor'] = df['b_factor'].map(lambda b_factor: "" if pd.isna(b_factor) else f"{b_factor:.2f}")
 
     print(df)
 
     df.to_markdown(os.path.join(results_folder, output_file), index=False)
 
 if __name__ == '__main__':
-    json_to_md('results.json', 'results.md')
+    json_to_md('results.md')